@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Project, ProjectCategory
+from .models import OutboundEmail, PdfExportJob, Project, ProjectCategory
 
 
 @admin.register(Project)
@@ -18,3 +18,17 @@ class ProjectAdmin(admin.ModelAdmin):
 admin.site.register(ProjectCategory)
 class ProjectCategoryAdmin(admin.ModelAdmin):
     list_display = ["name"]
+
+
+@admin.register(PdfExportJob)
+class PdfExportJobAdmin(admin.ModelAdmin):
+    list_display = ["project", "requested_by", "status", "progress",
+                    "created_at", "finished_at"]
+    list_filter = ["status"]
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ["subject", "status", "attempts", "next_attempt_at",
+                    "sent_at"]
+    list_filter = ["status"]
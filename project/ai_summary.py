@@ -0,0 +1,257 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from project import metrics
+
+SUMMARY_UNAVAILABLE = 'AI-generated description unavailable.'
+
+
+class SummaryError(Exception):
+    """
+    Raised when the AI service cannot be reached or answers with an error.
+    """
+
+
+def build_summary_prompt(description, title=None, category=None):
+    """
+    Construct the prompt based on the provided project data.
+    """
+    prompt = "Generate a summary for the following project description"
+
+    if title:
+        prompt += f" for the project titled '{title}'"
+        if category:
+            prompt += f" in the category of '{category}'"
+    elif category:
+        prompt += f" in the category of '{category}'"
+
+    prompt += f". Here is the description: {description}"
+    return prompt
+
+
+def summary_api_url():
+    return f"{settings.HUGGINGFACE_API_URL}/models/EleutherAI/gpt-neo-2.7B"
+
+
+def summary_api_headers():
+    return {
+        "Authorization": f"Bearer {os.environ.get('HUGGINGFACE_ACCESS_TOKEN')}"
+    }
+
+
+def parse_summary_response(response_data):
+    """
+    Extract the generated text from a Hugging Face inference response.
+    """
+    if isinstance(response_data, list):
+        return response_data[0].get('generated_text', SUMMARY_UNAVAILABLE)
+    if isinstance(response_data, dict):
+        return response_data.get('generated_text', SUMMARY_UNAVAILABLE)
+    return SUMMARY_UNAVAILABLE
+
+
+# Reused across requests so calls share pooled keep-alive connections.
+# `requests` and `httpx` are imported on first use, so workers that never
+# summarize do not load them.
+_session = None
+_session_lock = threading.Lock()
+
+# One pooled async client per event loop, as clients cannot be shared
+# between loops.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_session():
+    """
+    Return the pooled HTTP session of this process.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            _session = requests.Session()
+        return _session
+
+
+def request_summary(prompt):
+    """
+    Ask the Hugging Face model for a summary of `prompt`.
+
+    Raises `SummaryError` on failure.
+    """
+    import requests
+
+    try:
+        with metrics.AI_SUMMARY_SECONDS.time('hf'):
+            response = get_session().post(
+                summary_api_url(),
+                headers=summary_api_headers(),
+                json={"inputs": prompt},
+                timeout=10
+            )
+            response.raise_for_status()
+            data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        # ValueError: the answer is not JSON
+        raise SummaryError(str(e)) from e
+    return parse_summary_response(data)
+
+
+def get_async_client():
+    """
+    Return the pooled HTTP client of the running event loop.
+    """
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(
+                max_connections=settings.HUGGINGFACE_MAX_CONNECTIONS,
+                max_keepalive_connections=(
+                    settings.HUGGINGFACE_MAX_KEEPALIVE_CONNECTIONS),
+            ),
+        )
+    return client
+
+
+async def arequest_summary(prompt):
+    """
+    Ask the Hugging Face model for a summary of `prompt` without blocking
+    the event loop.
+
+    Raises `SummaryError` on failure.
+    """
+    import httpx
+
+    try:
+        with metrics.AI_SUMMARY_SECONDS.time('hf'):
+            response = await get_async_client().post(
+                summary_api_url(),
+                headers=summary_api_headers(),
+                json={"inputs": prompt},
+            )
+            response.raise_for_status()
+            data = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        # ValueError: the body is not JSON.
+        raise SummaryError(str(e)) from e
+    return parse_summary_response(data)
+
+
+class SummaryCache:
+    """
+    Thread-safe TTL + LRU cache with single-flight computation.
+
+    Concurrent misses on the same key wait for the first caller's
+    computation instead of starting their own. Failures are not cached;
+    they are raised to every caller waiting on them.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _claim(self, key):
+        """
+        Return `(value, future, leader)`: the cached value if fresh,
+        otherwise the in-flight future for `key` and whether the caller
+        must compute it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value, None, False
+                del self._entries[key]
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return None, future, False
+
+            self.misses += 1
+            future = self._in_flight[key] = Future()
+            return None, future, True
+
+    def _resolve(self, key, future, value=None, error=None):
+        with self._lock:
+            if error is None:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            del self._in_flight[key]
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+    def get_or_compute(self, key, compute):
+        value, future, leader = self._claim(key)
+        if future is None:
+            return value
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            self._resolve(key, future, error=e)
+            raise
+        self._resolve(key, future, value)
+        return value
+
+    async def aget_or_compute(self, key, compute):
+        """
+        Like `get_or_compute`, for a coroutine function `compute`. Sync
+        and async callers share the same in-flight computations.
+        """
+        value, future, leader = self._claim(key)
+        if future is None:
+            return value
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            value = await compute()
+        except BaseException as e:
+            self._resolve(key, future, error=e)
+            raise
+        self._resolve(key, future, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'size': len(self._entries),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.coalesced = 0
+
+
+summary_cache = SummaryCache(
+    settings.AI_SUMMARY_CACHE_SIZE, settings.AI_SUMMARY_CACHE_TTL)
@@ -0,0 +1,74 @@
+import itertools
+import zipfile
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from project.pdf_cache import get_project_pdfs
+
+
+class _ZipStream:
+    """
+    Write-only file object that hands out what has been written so far.
+
+    It has no `seek`, so `zipfile` writes the archive strictly forward
+    and never needs to go back over data that was already streamed.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_projects_zip(projects):
+    """
+    Yield a ZIP archive of the projects' PDFs chunk by chunk.
+
+    PDFs are rendered (or read from the render cache) a batch at a time
+    when the archive reaches them, so memory use does not grow with the
+    number of projects. Batches are spread over the render pool when
+    `PDF_RENDER_PROCESSES` is set.
+    """
+    from project.rendering import get_executor
+
+    executor = get_executor()
+    batch_size = settings.PDF_RENDER_PROCESSES * 2 or 1
+    projects = iter(projects)
+    stream = _ZipStream()
+    # PDFs are already compressed; storing them avoids a pointless pass.
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED) as archive:
+        while batch := list(itertools.islice(projects, batch_size)):
+            for project, pdf in zip(batch, get_project_pdfs(batch, executor)):
+                archive.writestr(f"project_{project.id}.pdf", pdf)
+                yield stream.pop()
+    yield stream.pop()
+
+
+async def aiter_projects_zip(projects):
+    """
+    `iter_projects_zip` as an async iterator, for responses served over
+    ASGI, where Django reads a sync iterator whole before sending it.
+
+    Chunks are still made one at a time, in the thread sync code runs in,
+    which owns the database connection `projects` reads from.
+    """
+    chunks = iter_projects_zip(projects)
+    done = object()
+    while (chunk := await sync_to_async(next)(chunks, done)) is not done:
+        yield chunk
@@ -0,0 +1,144 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from project.models import Project
+from project.serializers import ProjectSerializer
+from project.signals import batched_project_updates
+
+OPERATIONS = ('create', 'update', 'delete')
+
+
+def _is_id(pk):
+    # JSON true and false are ints to Python.
+    return isinstance(pk, int) and not isinstance(pk, bool)
+
+
+def _validate(operations, user):
+    """
+    Validate every operation and return `(plan, errors)`, where `plan`
+    holds `(op, project, validated_data)` and `errors` one entry per
+    operation (None when valid).
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValidationError(
+            {'operations': "Expected a non-empty list of operations."})
+    if len(operations) > settings.PROJECT_BATCH_MAX_OPERATIONS:
+        raise ValidationError({'operations': (
+            f"At most {settings.PROJECT_BATCH_MAX_OPERATIONS} operations "
+            "per batch.")})
+
+    target_ids = [
+        operation.get('id') for operation in operations
+        if isinstance(operation, dict) and operation.get('op') != 'create'
+    ]
+    projects = Project.objects.filter(
+        created_by=user,
+        id__in=[pk for pk in target_ids if _is_id(pk)],
+    ).in_bulk()
+
+    # One serializer per kind validates every item without rebuilding
+    # fields; the dates of updates are checked against their project below.
+    create_serializer = ProjectSerializer()
+    update_serializer = ProjectSerializer(partial=True)
+
+    plan, errors, seen = [], [], set()
+    for operation in operations:
+        op = operation.get('op') if isinstance(operation, dict) else None
+        if op not in OPERATIONS:
+            errors.append({'op': f"Expected one of {', '.join(OPERATIONS)}."})
+            plan.append(None)
+            continue
+
+        project = None
+        if op != 'create':
+            pk = operation.get('id')
+            project = projects.get(pk) if _is_id(pk) else None
+            if project is None:
+                errors.append({'id': "Not found."})
+                plan.append(None)
+                continue
+            if pk in seen:
+                errors.append({'id': "Appears in more than one operation."})
+                plan.append(None)
+                continue
+            seen.add(pk)
+
+        data = None
+        if op != 'delete':
+            serializer = (
+                create_serializer if op == 'create' else update_serializer)
+            try:
+                data = serializer.run_validation(operation.get('data'))
+                ProjectSerializer.check_dates(data, project)
+            except ValidationError as e:
+                errors.append(e.detail)
+                plan.append(None)
+                continue
+
+        errors.append(None)
+        plan.append((op, project, data))
+
+    return plan, errors
+
+
+def apply_batch(operations, user):
+    """
+    Validate and apply a list of create/update/delete operations on the
+    user's projects in one transaction, with bulk queries.
+
+    Returns `(results, ok)`: one result per operation, and whether the
+    batch was applied. Nothing is applied if any operation is invalid.
+    """
+    plan, errors = _validate(operations, user)
+    if any(errors):
+        return [
+            {'status': 'error', 'errors': error} if error
+            else {'status': 'skipped'}
+            for error in errors
+        ], False
+
+    now = timezone.now()
+    created, updated, deleted_ids, update_fields = [], [], [], {'updated_at'}
+    for op, project, data in plan:
+        if op == 'create':
+            created.append(Project(created_by=user, **data))
+        elif op == 'update':
+            for field, value in data.items():
+                setattr(project, field, value)
+            project.updated_at = now
+            update_fields.update(data)
+            updated.append(project)
+        else:
+            deleted_ids.append(project.id)
+
+    with transaction.atomic(), batched_project_updates() as pending:
+        Project.objects.bulk_create(created, batch_size=500)
+        if updated:
+            Project.objects.bulk_update(
+                updated, sorted(update_fields), batch_size=500)
+        if deleted_ids:
+            # Deleting sends post_delete per project, collected by the
+            # batch above.
+            Project.objects.filter(id__in=deleted_ids).delete()
+
+        written_ids = [project.id for project in created + updated]
+        if written_ids:
+            Project.objects.filter(
+                id__in=written_ids).update_search_vector()
+
+        # Bulk writes send no signals, so record their side effects here.
+        for project in created:
+            pending.added.append(project.stats_snapshot())
+        for project in updated:
+            pending.removed.append(project._stats_snapshot)
+            pending.added.append(project.stats_snapshot())
+            pending.pdf_project_ids.add(project.id)
+
+    created_ids = iter(project.id for project in created)
+    return [
+        {'status': 'ok', 'op': op,
+         'id': next(created_ids) if op == 'create' else project.id}
+        for op, project, _ in plan
+    ], True
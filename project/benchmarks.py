@@ -0,0 +1,306 @@
+import datetime
+import gc
+import platform
+import random
+import statistics
+import subprocess
+import time
+from io import BytesIO
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image as PILImage
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from project import category_cache, stats
+from project.models import Image, Project, ProjectCategory
+from project.serializers import ProjectSerializer
+from project.utils import generate_pdf, make_pdf_image
+from project.views import ProjectList
+from user.models import User
+from user.serializers import SignUpSerializer
+
+WORDS = (
+    "plan audit launch review migrate design budget hire train report "
+    "market research deliver support upgrade office client vendor policy "
+    "quarter roadmap backlog release testing security network onboarding"
+).split()
+IMAGE_DIR = 'project_images/benchmark'
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _image_pool(prefix, count, rng):
+    """
+    Store `count` distinct images and return their `(image, pdf_image)`
+    storage names.
+    """
+    names = []
+    for i in range(count):
+        buffer = BytesIO()
+        color = tuple(rng.randrange(256) for _ in range(3))
+        PILImage.new('RGB', (1200, 900), color).save(buffer, 'PNG')
+        upload = ContentFile(buffer.getvalue(), name=f'{prefix}-{i}.png')
+        pdf_image = make_pdf_image(upload)
+        names.append((
+            default_storage.save(f'{IMAGE_DIR}/{upload.name}', upload),
+            default_storage.save(
+                f'{IMAGE_DIR}/pdf/{pdf_image.name}', pdf_image),
+        ))
+    return names
+
+
+def seed(prefix='bench', users=10, categories=5, projects=100, images=2,
+         image_pool=8, seed=0):
+    """
+    Create `users` users with `projects` projects each, spread over
+    `categories` categories, each project showing `images` images drawn
+    from `image_pool` stored files. The same arguments create the same
+    data. Returns the number of projects created.
+    """
+    rng = random.Random(seed)
+    # One hash for every user: hashing is not what is being measured.
+    password = make_password('benchmark')
+    new_users = User.objects.bulk_create(
+        User(username=f'{prefix}-user-{i}',
+             email=f'{prefix}-user-{i}@example.com',
+             password=password)
+        for i in range(users))
+    new_categories = ProjectCategory.objects.bulk_create(
+        ProjectCategory(name=f'{prefix} category {i}')
+        for i in range(categories))
+
+    start = datetime.date(2024, 1, 1)
+    new_projects = []
+    for user in new_users:
+        for _ in range(projects):
+            start_date = start + datetime.timedelta(days=rng.randrange(730))
+            new_projects.append(Project(
+                title=_sentence(rng, rng.randint(2, 6)),
+                description=_sentence(rng, rng.randint(20, 120)),
+                start_date=start_date,
+                end_date=start_date + datetime.timedelta(
+                    days=rng.randrange(1, 180)),
+                category=rng.choice(new_categories),
+                priority=rng.choice(Project.ProjectPriority.values),
+                status=rng.choice(Project.ProjectStatus.values),
+                created_by=user,
+            ))
+
+    with transaction.atomic():
+        Project.objects.bulk_create(new_projects, batch_size=1000)
+        if images:
+            pool = _image_pool(prefix, image_pool, rng)
+            new_images = Image.objects.bulk_create(
+                (Image(image=image, pdf_image=pdf_image)
+                 for image, pdf_image in (
+                     rng.choice(pool)
+                     for _ in range(len(new_projects) * images))),
+                batch_size=1000)
+            owners = [project for project in new_projects
+                      for _ in range(images)]
+            Through = Project.images.through
+            Through.objects.bulk_create(
+                (Through(project_id=project.id, image_id=image.id)
+                 for project, image in zip(owners, new_images)),
+                batch_size=1000)
+
+        # Bulk inserts send no signals.
+        Project.objects.filter(
+            created_by__in=new_users).update_search_vector()
+        stats.rebuild([user.id for user in new_users])
+    category_cache.bump_version()
+    return len(new_projects)
+
+
+def clear(prefix='bench'):
+    """
+    Delete the data created by `seed` with `prefix`.
+    """
+    users = User.objects.filter(username__startswith=f'{prefix}-user-')
+    images = Image.objects.filter(
+        project__created_by__in=users,
+        image__startswith=f'{IMAGE_DIR}/{prefix}-')
+    names = set()
+    for image, pdf_image in images.values_list('image', 'pdf_image'):
+        names.update((image, pdf_image))
+    with transaction.atomic():
+        Image.objects.filter(id__in=images.values('id')).delete()
+        users.delete()
+        ProjectCategory.objects.filter(
+            name__startswith=f'{prefix} category ').delete()
+    for name in names:
+        default_storage.delete(name)
+
+
+def measure(run, repeat, warmup=1):
+    """
+    Time `repeat` calls of `run` after `warmup` calls, the first of which
+    also counts the SQL queries of one call.
+    """
+    for i in range(warmup):
+        if i == 0:
+            with CaptureQueriesContext(connection) as ctx:
+                run()
+            queries = len(ctx.captured_queries)
+        else:
+            run()
+
+    times = []
+    gc.collect()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return {
+        'repeat': repeat,
+        'queries': queries if warmup else None,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.fmean(times),
+        'max': max(times),
+    }
+
+
+def benchmark_user(prefix):
+    """
+    Return the seeded user with the most projects.
+    """
+    user = (User.objects
+            .filter(username__startswith=f'{prefix}-user-')
+            .order_by(F('project_stats__total').desc(nulls_last=True), 'id')
+            .first())
+    if user is None or not user.projects.exists():
+        return None
+    return user
+
+
+def cases(user, sizes):
+    """
+    Yield `(name, run)` for every benchmark, with `sizes` the numbers of
+    projects handled at once.
+    """
+    factory = APIRequestFactory()
+    request = factory.get('/')
+    projects = Project.objects.filter(created_by=user).order_by('-id')
+
+    project = (projects
+               .prefetch_related('images')
+               .select_related('category')
+               .first())
+    yield 'generate_pdf', lambda: generate_pdf(project)
+
+    for size in sizes:
+        page = list(projects.prefetch_related('images')[:size])
+        yield (f'project_serializer.dump[{size}]',
+               lambda page=page: ProjectSerializer(
+                   page, many=True, context={'request': request}).data)
+
+        payloads = [
+            {key: value for key, value in data.items()
+             if key not in ('id', 'images', 'created_at', 'updated_at')}
+            for data in ProjectSerializer(page, many=True).data
+        ]
+
+        def load(payloads=payloads):
+            for data in payloads:
+                ProjectSerializer(data=data).is_valid(raise_exception=True)
+        yield f'project_serializer.load[{size}]', load
+
+    view = ProjectList.as_view()
+    for size in sizes:
+        def list_projects(size=size):
+            list_request = factory.get('/projects/', {'page_size': size})
+            force_authenticate(list_request, user)
+            view(list_request).render()
+        yield f'project_list[{size}]', list_projects
+
+    counter = iter(range(10 ** 9))
+
+    def signup_data():
+        i = next(counter)
+        return {'username': f'signup-bench-{i}',
+                'email': f'signup-bench-{i}@example.com',
+                'password': 'benchmark-password'}
+
+    yield ('signup_serializer.validate',
+           lambda: SignUpSerializer(data=signup_data()).is_valid(
+               raise_exception=True))
+
+    def signup():
+        with transaction.atomic():
+            serializer = SignUpSerializer(data=signup_data())
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            transaction.set_rollback(True)
+    yield 'signup_serializer.create', signup
+
+
+def run(prefix='bench', sizes=(10, 25, 100), repeat=5, only=None):
+    """
+    Run the benchmarks whose name contains one of `only` (all by default)
+    and return the results with the environment they ran in.
+    """
+    user = benchmark_user(prefix)
+    if user is None:
+        return None
+
+    results = {}
+    for name, case in cases(user, sizes):
+        if only and not any(part in name for part in only):
+            continue
+        results[name] = measure(case, repeat)
+
+    return {
+        'environment': environment(),
+        'dataset': {
+            'prefix': prefix,
+            'projects': user.projects.count(),
+            'images': Image.objects.filter(
+                project__created_by=user).count(),
+        },
+        'results': results,
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Return `(name, baseline median, current median, ratio)` for every
+    benchmark of both runs, and the names that got slower than
+    `threshold` times the baseline.
+    """
+    rows, regressions = [], []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        ratio = result['median'] / before['median']
+        rows.append((name, before['median'], result['median'], ratio))
+        if ratio > threshold:
+            regressions.append(name)
+    return rows, regressions
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from project.models import ProjectCategory
+
+VERSION_KEY = 'project:category-version'
+
+_lock = threading.Lock()
+_cached = {'version': None, 'checked_at': 0.0, 'categories': [],
+           'by_id': {}, 'etag': None}
+
+
+def _current_version():
+    """
+    Return the shared version stamp of the category table.
+
+    It lives in the default cache, which `CACHES` shares between
+    processes, so a bump in one process invalidates every process.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """
+    Invalidate the cached categories of every process: this one at once,
+    the others when they next check the version.
+    """
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    with _lock:
+        _cached['version'] = None
+
+
+def _load(version):
+    categories = list(
+        ProjectCategory.objects.order_by('id').values('id', 'name'))
+    etag = '"%s"' % hashlib.sha1(
+        json.dumps(categories).encode('utf-8')).hexdigest()
+    with _lock:
+        _cached.update(
+            version=version,
+            categories=categories,
+            by_id={category['id']: category for category in categories},
+            etag=etag,
+        )
+
+
+def _refresh(force=False):
+    """
+    Return the cached categories, reloaded when forced or when the shared
+    version changed. The version is checked at most once every
+    `PROJECT_CATEGORY_CACHE_TTL` seconds.
+    """
+    now = time.monotonic()
+    fresh = now - _cached['checked_at'] < settings.PROJECT_CATEGORY_CACHE_TTL
+    if not force and fresh and _cached['version'] is not None:
+        return _cached
+    version = _current_version()
+    if force or _cached['version'] != version:
+        _load(version)
+    _cached['checked_at'] = now
+    return _cached
+
+
+def get_categories():
+    """
+    Return the list of categories as dicts and its ETag.
+    """
+    cached = _refresh()
+    return cached['categories'], cached['etag']
+
+
+def get_category(pk):
+    """
+    Return the category with primary key `pk`, or None if there is none.
+
+    Unknown ids reload the table once, in case the category was created
+    by a transaction that has not bumped the version yet.
+    """
+    category = _refresh()['by_id'].get(pk)
+    if category is None:
+        category = _refresh(force=True)['by_id'].get(pk)
+    if category is None:
+        return None
+    return ProjectCategory.from_db(
+        None, ['id', 'name'], [category['id'], category['name']])
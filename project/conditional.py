@@ -0,0 +1,36 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def check_conditions(request, etag=None, last_modified=None):
+    """
+    Return a `304 Not Modified` response if the client's copy is current,
+    otherwise None. `last_modified` is a datetime.
+    """
+    timestamp = last_modified and int(last_modified.timestamp())
+    return get_conditional_response(
+        request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag=None, last_modified=None):
+    """
+    Add validators to a response and make clients revalidate it.
+    """
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Responses depend on the user, so shared caches must not keep them.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def make_etag(*parts):
+    """
+    Return a strong ETag for the given values.
+    """
+    digest = hashlib.sha1(
+        '|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
@@ -0,0 +1,87 @@
+import datetime
+
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from project.models import Project
+
+
+class ProjectFilter(filters.BaseFilterBackend):
+    """
+    Filter projects with query parameters.
+
+    `status`, `priority` and `category` accept comma separated values;
+    `start_date_after`, `start_date_before`, `end_date_after` and
+    `end_date_before` are inclusive ISO dates. Every filter is answered by
+    one of the `(created_by, ...)` indexes on `Project`.
+    """
+    choice_fields = {
+        'status': Project.ProjectStatus.values,
+        'priority': Project.ProjectPriority.values,
+    }
+    date_ranges = {
+        'start_date_after': 'start_date__gte',
+        'start_date_before': 'start_date__lte',
+        'end_date_after': 'end_date__gte',
+        'end_date_before': 'end_date__lte',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        errors = {}
+
+        for field, choices in self.choice_fields.items():
+            values = self.split(params.get(field))
+            if not values:
+                continue
+            invalid = [value for value in values if value not in choices]
+            if invalid:
+                errors[field] = f"Invalid choice(s): {', '.join(invalid)}."
+            else:
+                queryset = queryset.filter(**{f'{field}__in': values})
+
+        categories = self.split(params.get('category'))
+        if categories:
+            try:
+                queryset = queryset.filter(
+                    category__in=[int(category) for category in categories])
+            except ValueError:
+                errors['category'] = "Expected category ids."
+
+        for param, lookup in self.date_ranges.items():
+            value = params.get(param)
+            if not value:
+                continue
+            try:
+                queryset = queryset.filter(
+                    **{lookup: datetime.date.fromisoformat(value)})
+            except ValueError:
+                errors[param] = "Expected a date in YYYY-MM-DD format."
+
+        if errors:
+            raise ValidationError(errors)
+        return queryset
+
+    @staticmethod
+    def split(value):
+        if not value:
+            return []
+        return [part.strip() for part in value.split(',') if part.strip()]
+
+
+class ProjectOrderingFilter(filters.OrderingFilter):
+    """
+    `OrderingFilter` ordering `priority` by rank rather than by label,
+    through the `priority_rank` annotation of the project list.
+    """
+    aliases = {'priority': 'priority_rank'}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [
+            ('-' if field.startswith('-') else '')
+            + self.aliases.get(field.lstrip('-'), field.lstrip('-'))
+            for field in ordering
+        ]
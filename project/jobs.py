@@ -0,0 +1,136 @@
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from project.models import PdfExportJob, Project
+from project.pdf_cache import get_project_pdfs
+
+JobStatus = PdfExportJob.JobStatus
+
+
+def enqueue_pdf_export(project, user):
+    """
+    Queue a PDF render of `project` requested by `user`.
+    """
+    return PdfExportJob.objects.create(project=project, requested_by=user)
+
+
+def claim_jobs(limit):
+    """
+    Mark up to `limit` queued jobs as running and return them.
+
+    Rows are locked with SKIP LOCKED so several workers can poll the
+    same table without claiming a job twice. A job left running longer
+    than `PDF_EXPORT_LEASE` seconds, by a worker that died, is claimed
+    again, and failed once it was claimed `PDF_EXPORT_MAX_ATTEMPTS` times.
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=settings.PDF_EXPORT_LEASE)
+    with transaction.atomic():
+        claimable = list(
+            PdfExportJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status=JobStatus.QUEUED) |
+                    Q(status=JobStatus.RUNNING, started_at__lt=expired))
+            .order_by('id')
+            .values_list('id', 'attempts')[:limit]
+        )
+        job_ids, exhausted = [], []
+        for job_id, attempts in claimable:
+            if attempts < settings.PDF_EXPORT_MAX_ATTEMPTS:
+                job_ids.append(job_id)
+            else:
+                exhausted.append(job_id)
+        PdfExportJob.objects.filter(id__in=exhausted).update(
+            status=JobStatus.FAILED,
+            error="Rendering was interrupted too many times.",
+            finished_at=now,
+        )
+        PdfExportJob.objects.filter(id__in=job_ids).update(
+            status=JobStatus.RUNNING,
+            progress=10,
+            started_at=now,
+            attempts=F('attempts') + 1,
+        )
+
+    return list(PdfExportJob.objects.filter(id__in=job_ids).order_by('id'))
+
+
+def release_jobs(jobs):
+    """
+    Put claimed jobs that were not rendered back in the queue.
+    """
+    PdfExportJob.objects.filter(
+        id__in=[job.id for job in jobs], status=JobStatus.RUNNING,
+    ).update(status=JobStatus.QUEUED, progress=0, started_at=None)
+
+
+def complete_job(job, error=None):
+    """
+    Store the outcome of a render on its job. The PDF itself stays in the
+    PDF cache, which the download reads.
+    """
+    job.finished_at = timezone.now()
+    if error is None:
+        job.status = JobStatus.DONE
+        job.progress = 100
+    else:
+        job.status = JobStatus.FAILED
+        job.error = error
+    job.save()
+
+
+def process_jobs(jobs, executor=None):
+    """
+    Render claimed jobs, in parallel on `executor`, a pool from
+    `rendering.new_executor`, when one is given and inline otherwise.
+
+    Raises `BrokenProcessPool` if a render process died, after putting
+    the jobs it took down back in the queue.
+    """
+    projects = Project.objects.prefetch_related('images').in_bulk(
+        [job.project_id for job in jobs])
+    for job in jobs:
+        if job.project_id not in projects:
+            complete_job(job, error="Project matching query does not exist.")
+    jobs = [job for job in jobs if job.project_id in projects]
+
+    try:
+        pdfs = get_project_pdfs(
+            [projects[job.project_id] for job in jobs], executor,
+            return_exceptions=True)
+    except BrokenProcessPool:
+        release_jobs(jobs)
+        raise
+
+    # Jobs lost with a render process are not at fault: queue them again
+    # and let the caller replace the pool.
+    lost = []
+    for job, pdf in zip(jobs, pdfs):
+        if isinstance(pdf, BrokenProcessPool):
+            lost.append(job)
+        elif isinstance(pdf, Exception):
+            complete_job(job, error=str(pdf))
+        else:
+            complete_job(job)
+    if lost:
+        release_jobs(lost)
+        raise BrokenProcessPool(f"{len(lost)} job(s) lost with the pool.")
+
+
+def purge_finished(max_age=None):
+    """
+    Delete jobs finished more than `max_age` seconds ago
+    (`PDF_EXPORT_RETENTION` by default) and return how many there were.
+    """
+    if max_age is None:
+        max_age = settings.PDF_EXPORT_RETENTION
+    count, _ = PdfExportJob.objects.filter(
+        status__in=[JobStatus.DONE, JobStatus.FAILED],
+        finished_at__lt=timezone.now() - timedelta(seconds=max_age),
+    ).delete()
+    return count
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from project.outbox import dispatch_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver queued project emails in batches over one SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help="Emails sent per SMTP connection.")
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0,
+            help="Seconds to wait when no email is due.")
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once no email is due instead of polling.")
+
+    def handle(self, *args, **options):
+        while True:
+            handled = dispatch_batch(options['batch_size'])
+            if handled:
+                self.stdout.write(f"Handled {handled} email(s).")
+            elif options['once']:
+                return
+            else:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from project.pdf_cache import evict
+
+
+class Command(BaseCommand):
+    help = "Delete least recently used PDF renders until the cache fits."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-bytes', type=int, default=None,
+            help="Size to shrink the cache to (default: "
+                 "PDF_CACHE_MAX_BYTES).")
+
+    def handle(self, *args, **options):
+        count = evict(options['max_bytes'])
+        self.stdout.write(f"Deleted {count} render(s).")
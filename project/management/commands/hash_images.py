@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from project.models import Image
+from project.uploads import file_sha256
+
+
+class Command(BaseCommand):
+    help = ("Store the content hash of images uploaded before hashing, so "
+            "new uploads of the same files reuse them.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch, hashed, missing = [], 0, 0
+        for image in Image.objects.filter(content_hash__isnull=True).iterator(
+                chunk_size=options['batch_size']):
+            try:
+                with image.image.open('rb') as f:
+                    image.content_hash = file_sha256(f)
+            except (FileNotFoundError, ValueError):
+                missing += 1
+                continue
+            batch.append(image)
+            if len(batch) >= options['batch_size']:
+                hashed += Image.objects.bulk_update(batch, ['content_hash'])
+                batch = []
+        if batch:
+            hashed += Image.objects.bulk_update(batch, ['content_hash'])
+        self.stdout.write(
+            f"Hashed {hashed} image(s), {missing} file(s) missing.")
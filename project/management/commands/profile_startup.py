@@ -0,0 +1,53 @@
+import json
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+
+from project import startup
+
+
+class Command(BaseCommand):
+    help = ("Start a fresh interpreter the way a web worker starts and "
+            "report the import time of each module.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=30,
+                            help="Number of modules to list.")
+        parser.add_argument(
+            '--sort', choices=['cumulative', 'self'], default='cumulative',
+            help="Rank modules with or without the modules they import.")
+        parser.add_argument('--warm-up', action='store_true',
+                            help="Start the worker with WARM_UP_WORKERS set.")
+        parser.add_argument('--output',
+                            help="Write every import as JSON here.")
+
+    def handle(self, *args, **options):
+        try:
+            imports, seconds = startup.profile_imports(options['warm_up'])
+        except subprocess.CalledProcessError as e:
+            raise CommandError(
+                f"The worker failed to start:\n{e.stderr.strip()}")
+
+        column = 2 if options['sort'] == 'cumulative' else 1
+        ranked = sorted(imports, key=lambda row: row[column], reverse=True)
+        self.stdout.write(f"{'cumulative':>13} {'self':>11}  module")
+        for module, self_us, cumulative in ranked[:options['limit']]:
+            self.stdout.write(
+                f"{cumulative / 1000:10.1f} ms {self_us / 1000:8.1f} ms  "
+                f"{module}")
+
+        total = sum(self_us for _, self_us, _ in imports)
+        self.stdout.write(
+            f"{len(imports)} modules imported in {total / 1000:.1f} ms; "
+            f"the worker started in {seconds * 1000:.1f} ms.")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'warm_up': options['warm_up'],
+                    'seconds': seconds,
+                    'imports': [
+                        {'module': module, 'self_us': self_us,
+                         'cumulative_us': cumulative}
+                        for module, self_us, cumulative in imports],
+                }, f, indent=2)
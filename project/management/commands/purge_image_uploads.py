@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from project.uploads import purge_stale
+
+
+class Command(BaseCommand):
+    help = "Discard unfinished chunked image uploads that were abandoned."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=int, default=None,
+            help="Seconds without a chunk after which an upload is "
+                 "abandoned (default: IMAGE_UPLOAD_EXPIRY).")
+
+    def handle(self, *args, **options):
+        count = purge_stale(options['max_age'])
+        self.stdout.write(f"Discarded {count} upload(s).")
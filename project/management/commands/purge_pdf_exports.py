@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from project.jobs import purge_finished
+
+
+class Command(BaseCommand):
+    help = "Delete finished PDF export jobs past their retention."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=int, default=None,
+            help="Seconds a finished job is kept (default: "
+                 "PDF_EXPORT_RETENTION).")
+
+    def handle(self, *args, **options):
+        count = purge_finished(options['max_age'])
+        self.stdout.write(f"Deleted {count} job(s).")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from project import stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard project statistics from the projects."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'user_ids', nargs='*', type=int,
+            help="Only rebuild these users (default: everyone).")
+
+    def handle(self, *args, **options):
+        rebuilt = stats.rebuild(options['user_ids'] or None)
+        self.stdout.write(f"Rebuilt statistics of {rebuilt} user(s).")
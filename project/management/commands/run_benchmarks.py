@@ -0,0 +1,68 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from project import benchmarks
+
+
+class Command(BaseCommand):
+    help = ("Time generate_pdf, ProjectSerializer, ProjectList and "
+            "SignUpSerializer on data from seed_benchmark_data, and write "
+            "the results as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench',
+                            help="Prefix the data was seeded with.")
+        parser.add_argument(
+            '--sizes', default='10,25,100',
+            help="Comma separated numbers of projects handled at once.")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--only', default='',
+            help="Comma separated parts of the benchmark names to run.")
+        parser.add_argument('--output', help="Write the results here.")
+        parser.add_argument(
+            '--compare',
+            help="Results of an earlier run to compare the medians with.")
+        parser.add_argument(
+            '--threshold', type=float, default=1.2,
+            help="Fail when a median exceeds the compared one this many "
+                 "times.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes expects comma separated integers.")
+        only = [part for part in options['only'].split(',') if part]
+
+        report = benchmarks.run(
+            prefix=options['prefix'], sizes=sizes,
+            repeat=options['repeat'], only=only)
+        if report is None:
+            raise CommandError(
+                "No seeded data; run seed_benchmark_data first.")
+
+        for name, result in report['results'].items():
+            self.stdout.write(
+                f"{name:<36} median {result['median'] * 1000:9.2f} ms  "
+                f"min {result['min'] * 1000:9.2f} ms  "
+                f"{result['queries']} queries")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            rows, regressions = benchmarks.compare(
+                baseline, report, options['threshold'])
+            for name, before, after, ratio in rows:
+                self.stdout.write(
+                    f"{name:<36} {before * 1000:9.2f} -> "
+                    f"{after * 1000:9.2f} ms  x{ratio:.2f}")
+            if regressions:
+                raise CommandError(
+                    f"Slower than x{options['threshold']}: "
+                    f"{', '.join(regressions)}")
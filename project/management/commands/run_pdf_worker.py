@@ -0,0 +1,51 @@
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+
+from project.jobs import claim_jobs, process_jobs
+from project.rendering import new_executor
+
+
+class Command(BaseCommand):
+    help = "Render queued project PDF exports in a pool of processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count(),
+            help="Number of render processes (0 renders in this process).")
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help="Seconds to wait when the queue is empty.")
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once the queue is empty instead of polling.")
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        if processes == 0:
+            self.run(None, 1, options)
+            return
+
+        # Projects are loaded here; the processes only lay out PDFs. A
+        # pool that lost a process is replaced, its jobs queued again.
+        while True:
+            try:
+                with new_executor(processes) as executor:
+                    self.run(executor, processes * 2, options)
+                return
+            except BrokenProcessPool:
+                self.stderr.write(
+                    "A render process died; starting a new pool.")
+
+    def run(self, executor, batch_size, options):
+        while True:
+            jobs = claim_jobs(batch_size)
+            if jobs:
+                process_jobs(jobs, executor)
+                self.stdout.write(f"Rendered {len(jobs)} PDF export(s).")
+            elif options['once']:
+                return
+            else:
+                time.sleep(options['poll_interval'])
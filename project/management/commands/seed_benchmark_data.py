@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from project import benchmarks
+from user.models import User
+
+
+class Command(BaseCommand):
+    help = ("Create users, categories, projects and images for "
+            "run_benchmarks. The same arguments create the same data.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench',
+                            help="Prefix of the created names.")
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument('--projects', type=int, default=100,
+                            help="Projects per user.")
+        parser.add_argument('--images', type=int, default=2,
+                            help="Images per project.")
+        parser.add_argument('--image-pool', type=int, default=8,
+                            help="Distinct image files the images share.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true',
+                            help="Delete data seeded with the prefix first.")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['clear']:
+            benchmarks.clear(prefix)
+        elif User.objects.filter(
+                username__startswith=f'{prefix}-user-').exists():
+            raise CommandError(
+                f"Data seeded with prefix '{prefix}' exists; use --clear.")
+
+        created = benchmarks.seed(
+            prefix=prefix,
+            users=options['users'],
+            categories=options['categories'],
+            projects=options['projects'],
+            images=options['images'],
+            image_pool=options['image_pool'],
+            seed=options['seed'],
+        )
+        self.stdout.write(f"Created {created} project(s).")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from project.models import Project
+
+
+class Command(BaseCommand):
+    help = "Recompute the full-text search vector of every project."
+
+    def handle(self, *args, **options):
+        updated = Project.objects.all().update_search_vector()
+        self.stdout.write(f"Updated {updated} project(s).")
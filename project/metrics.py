@@ -0,0 +1,217 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Timings of the request being handled, for its Server-Timing header.
+current_timings = contextvars.ContextVar('current_timings', default=None)
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class RequestTimings:
+    """
+    What one request spent its time on: SQL, and the named `timed`
+    sections it went through.
+    """
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.sections = {}
+
+    def add(self, name, seconds):
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper counting the queries of the request.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.db_queries += 1
+
+    def server_timing(self, total):
+        entries = [f'app;dur={total * 1000:.1f}']
+        if self.db_queries:
+            entries.append(f'db;dur={self.db_seconds * 1000:.1f};'
+                           f'desc="{self.db_queries} queries"')
+        entries += [f'{name};dur={seconds * 1000:.1f}'
+                    for name, seconds in self.sections.items()]
+        return ', '.join(entries)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        return '{%s}' % ','.join(
+            '%s="%s"' % (name, value.replace('\\', r'\\').replace('"', r'\"'))
+            for name, value in pairs)
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} {self.kind}']
+        lines += [f'{name}{labels} {value:g}'
+                  for name, labels, value in self.samples()]
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._bounds = [f'{bound:g}' for bound in self.buckets] + ['+Inf']
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or (
+                [0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, section=None, **labels):
+        """
+        Observe the duration of the block, also reported in the request's
+        Server-Timing header as `section` if given. An `outcome` label, if
+        the histogram has one, is `ok` or `error` depending on whether the
+        block raised.
+        """
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            yield
+            outcome = 'ok'
+        finally:
+            seconds = time.perf_counter() - start
+            if 'outcome' in self.labelnames:
+                labels['outcome'] = outcome
+            self.observe(seconds, **labels)
+            timings = current_timings.get()
+            if section and timings is not None:
+                timings.add(section, seconds)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(
+                (key, list(counts), total)
+                for key, (counts, total) in self._values.items())
+        samples = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self._bounds, counts):
+                cumulative += count
+                samples.append((f'{self.name}_bucket',
+                                self._labels(key, [('le', bound)]),
+                                cumulative))
+            samples.append((f'{self.name}_sum', self._labels(key), total))
+            samples.append((f'{self.name}_count', self._labels(key), cumulative))
+        return samples
+
+
+class Gauge(Metric):
+    """
+    A value read when the metrics are rendered.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, read):
+        super().__init__(name, documentation)
+        self.read = read
+
+    def samples(self):
+        return [(self.name, '', self.read())]
+
+
+REGISTRY = []
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds',
+    "Time spent handling requests, by view.",
+    ['view', 'method', 'status'])
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    "SQL queries run per request, by view.",
+    ['view'], buckets=COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram(
+    'http_request_db_duration_seconds',
+    "Time spent in SQL per request, by view.",
+    ['view'])
+PDF_RENDER_SECONDS = Histogram(
+    'pdf_render_duration_seconds',
+    "Time spent rendering project PDFs.")
+AI_SUMMARY_SECONDS = Histogram(
+    'ai_summary_request_duration_seconds',
+    "Latency of Hugging Face summary requests, by outcome.",
+    ['outcome'])
+SMTP_SEND_SECONDS = Histogram(
+    'smtp_send_duration_seconds',
+    "Time spent sending one email over SMTP, by outcome.",
+    ['outcome'])
+
+
+def _summary_cache_stat(name):
+    def read():
+        from project.ai_summary import summary_cache
+        return summary_cache.stats()[name]
+    return read
+
+
+for _stat in ('hits', 'misses', 'coalesced', 'size'):
+    Gauge(f'ai_summary_cache_{_stat}',
+          f"AI summary cache {_stat} of this process.",
+          _summary_cache_stat(_stat))
+
+
+def render():
+    """
+    Return every metric of this process in the Prometheus text format.
+    """
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+
+def observe_request(request, response, seconds, timings=None):
+    """
+    Record a handled request, and its SQL if `timings` counted it.
+    """
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'unmatched'
+    REQUEST_SECONDS.observe(
+        seconds, view=view, method=request.method,
+        status=response.status_code)
+    if timings is not None:
+        REQUEST_DB_QUERIES.observe(timings.db_queries, view=view)
+        REQUEST_DB_SECONDS.observe(timings.db_seconds, view=view)
@@ -0,0 +1,55 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+
+from project import metrics
+
+
+class MetricsMiddleware:
+    """
+    Record the duration and SQL of every request in `project.metrics`, and
+    add a Server-Timing header when `METRICS_SERVER_TIMING` is set.
+
+    Async views keep running on the event loop; their SQL runs in worker
+    threads and is not counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings = metrics.RequestTimings()
+        token = metrics.current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        finally:
+            metrics.current_timings.reset(token)
+        return self.finish(request, response, timings, start, timings)
+
+    async def __acall__(self, request):
+        timings = metrics.RequestTimings()
+        token = metrics.current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_timings.reset(token)
+        return self.finish(request, response, timings, start)
+
+    def finish(self, request, response, timings, start, db_timings=None):
+        seconds = time.perf_counter() - start
+        metrics.observe_request(request, response, seconds, db_timings)
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = timings.server_timing(seconds)
+        return response
@@ -1,4 +1,13 @@
+import os
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.postgres.fields import DateRangeField
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 
@@ -18,9 +27,78 @@ class ProjectCategory(models.Model):
 
 class Image(models.Model):
     image = models.ImageField(upload_to='project_images/')
+    # Downscaled copy embedded in PDF exports instead of the original.
+    pdf_image = models.ImageField(upload_to='project_images/pdf/', blank=True)
+    # SHA-256 of the file, so identical uploads reuse this row and file.
+    content_hash = models.CharField(
+        max_length=64, null=True, blank=True, editable=False, db_index=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
 
+class ImageUpload(models.Model):
+    """
+    A resumable, chunked image upload. Chunks are appended to a partial
+    file until `size` bytes are received, then `image` is set.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='image_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    image = models.ForeignKey(
+        Image, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def path(self):
+        return os.path.join(settings.IMAGE_UPLOAD_DIR, f'{self.id}.part')
+
+
+STATS_FIELDS = ('created_by_id', 'status', 'priority', 'category_id', 'end_date')
+
+ProjectSnapshot = namedtuple('ProjectSnapshot', STATS_FIELDS)
+
+
+def project_span():
+    """
+    Return the inclusive date range a project covers, as an expression
+    matching the GiST index on `Project`.
+    """
+    return models.Func(
+        models.F('start_date'), models.F('end_date'), models.Value('[]'),
+        function='daterange', output_field=DateRangeField())
+
+
+# Rank of each priority, lowest first, so projects order by urgency
+# rather than by label.
+PRIORITY_RANKS = {
+    'Trivial': 0, 'Low': 1, 'Medium': 2, 'High': 3, 'Critical': 4}
+
+
+def priority_rank():
+    """
+    Return the rank of a project's priority, as an expression matching the
+    `(created_by, priority rank, id)` index on `Project`.
+    """
+    return models.Case(
+        *(models.When(priority=priority, then=models.Value(rank))
+          for priority, rank in PRIORITY_RANKS.items()),
+        output_field=models.PositiveSmallIntegerField())
+
+
+class ProjectQuerySet(models.QuerySet):
+    def update_search_vector(self):
+        """
+        Recompute the full-text search vector of the selected projects.
+        """
+        return self.update(search_vector=(
+            SearchVector('title', weight='A', config='english') +
+            SearchVector('description', weight='B', config='english')
+        ))
+
+
 class Project(models.Model):
     class ProjectPriority(models.TextChoices):
         CRITICAL = 'Critical', _('Critical')
@@ -37,7 +115,8 @@ class Project(models.Model):
     title = models.CharField(max_length=255, null=False)
     description = models.TextField(null=False)
 
-    # created_at = models.DateTimeField(auto_now_add=True, null=False)
+    created_at = models.DateTimeField(auto_now_add=True, null=False)
+    updated_at = models.DateTimeField(auto_now=True, null=False)
     start_date = models.DateField(null=False)
     end_date = models.DateField(null=False)
 
@@ -61,5 +140,171 @@ class Project(models.Model):
 
     images = models.ManyToManyField(Image, blank=True)
 
+    # Weighted title + description, kept up to date by `save()`.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProjectQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Backs the keyset pagination of a user's project list.
+            models.Index(fields=['created_by', 'id'],
+                         name='project_created_by_id_idx'),
+            # Back the filters and orderings of the project list.
+            models.Index(fields=['created_by', 'status', 'id'],
+                         name='project_created_by_status_idx'),
+            models.Index(fields=['created_by', 'priority', 'id'],
+                         name='project_created_by_prio_idx'),
+            models.Index(models.F('created_by'), priority_rank(),
+                         models.F('id'), name='project_created_by_rank_idx'),
+            models.Index(fields=['created_by', 'category', 'id'],
+                         name='project_created_by_cat_idx'),
+            models.Index(fields=['created_by', 'start_date', 'id'],
+                         name='project_created_by_start_idx'),
+            models.Index(fields=['created_by', 'end_date', 'id'],
+                         name='project_created_by_end_idx'),
+            # Lets conditional list requests find the latest change cheaply.
+            models.Index(fields=['created_by', 'updated_at'],
+                         name='project_created_by_updated_idx'),
+            GinIndex(fields=['search_vector'],
+                     name='project_search_vector_idx'),
+            # Answers "which projects overlap this window" for the timeline.
+            GistIndex(project_span(), name='project_span_idx'),
+        ]
+        constraints = [
+            # An empty or inverted span would make `project_span()` fail.
+            models.CheckConstraint(
+                check=models.Q(end_date__gte=models.F('start_date')),
+                name='project_end_date_after_start_date'),
+        ]
+
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the dashboard statistics counted this project as.
+        instance._stats_snapshot = instance.stats_snapshot()
+        return instance
+
+    def stats_snapshot(self):
+        """
+        Return the fields counted by `ProjectStats`, or None if some of
+        them were deferred.
+        """
+        if any(field not in self.__dict__ for field in STATS_FIELDS):
+            return None
+        return ProjectSnapshot(*(getattr(self, field) for field in STATS_FIELDS))
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'title', 'description'} & set(update_fields):
+            Project.objects.filter(pk=self.pk).update_search_vector()
+
+
+class PdfExportJob(models.Model):
+    class JobStatus(models.TextChoices):
+        QUEUED = 'Queued', _('Queued')
+        RUNNING = 'Running', _('Running')
+        DONE = 'Done', _('Done')
+        FAILED = 'Failed', _('Failed')
+
+    project = models.ForeignKey(Project, related_name='pdf_export_jobs',
+                                on_delete=models.CASCADE, null=False)
+    requested_by = models.ForeignKey(User, related_name='pdf_export_jobs',
+                                     on_delete=models.CASCADE, null=False)
+
+    status = models.CharField(
+        max_length=7,
+        choices=JobStatus.choices,
+        default=JobStatus.QUEUED
+    )
+    progress = models.PositiveSmallIntegerField(default=0)
+    # Times a worker claimed the job; see `jobs.claim_jobs`.
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Lets workers find the oldest queued jobs without a scan.
+            models.Index(fields=['status', 'id'],
+                         name='pdfexportjob_status_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"PDF export of {self.project_id} ({self.status})"
+
+
+class OutboundEmail(models.Model):
+    class EmailStatus(models.TextChoices):
+        PENDING = 'Pending', _('Pending')
+        SENT = 'Sent', _('Sent')
+        FAILED = 'Failed', _('Failed')
+
+    project = models.ForeignKey(Project, related_name='outbound_emails',
+                                on_delete=models.CASCADE, null=False)
+    requested_by = models.ForeignKey(User, related_name='outbound_emails',
+                                     on_delete=models.CASCADE, null=False)
+
+    recipients = models.JSONField(default=list)
+    subject = models.CharField(max_length=255, null=False)
+    body = models.TextField(null=False)
+    include_pdf = models.BooleanField(default=False)
+
+    status = models.CharField(
+        max_length=7,
+        choices=EmailStatus.choices,
+        default=EmailStatus.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Lets the dispatcher find messages that are due without a scan.
+            models.Index(fields=['status', 'next_attempt_at'],
+                         name='outboundemail_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+class ProjectStats(models.Model):
+    """
+    Per-user project counts for the dashboard, updated as projects change.
+
+    `open_end_dates` counts the projects that are not done by end date,
+    so overdue projects can be counted for any day without a query.
+    """
+    user = models.OneToOneField(User, related_name='project_stats',
+                                on_delete=models.CASCADE, primary_key=True)
+
+    total = models.IntegerField(default=0)
+    by_status = models.JSONField(default=dict)
+    by_priority = models.JSONField(default=dict)
+    by_category = models.JSONField(default=dict)
+    open_end_dates = models.JSONField(default=dict)
+
+    class Meta:
+        verbose_name_plural = "Project stats"
+
+    def __str__(self):
+        return f"Project stats of {self.user}"
+
+    def overdue(self, today):
+        today = today.isoformat()
+        return sum(count for end_date, count in self.open_end_dates.items()
+                   if end_date < today)
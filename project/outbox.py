@@ -0,0 +1,104 @@
+import datetime
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from project import metrics
+from project.models import OutboundEmail
+from project.pdf_cache import get_project_pdf
+
+EmailStatus = OutboundEmail.EmailStatus
+
+
+def enqueue_project_email(project, user, recipients, include_pdf=False):
+    """
+    Queue an email with the project details for delivery by the dispatcher.
+    """
+    return OutboundEmail.objects.create(
+        project=project,
+        requested_by=user,
+        recipients=list(recipients),
+        subject=f"Project Details: {project.title}",
+        body=f"Description:\n\n{project.description}",
+        include_pdf=include_pdf,
+    )
+
+
+def build_message(email, connection=None):
+    """
+    Turn a queued email into an `EmailMessage`.
+    """
+    message = EmailMessage(email.subject, email.body, to=email.recipients,
+                           connection=connection)
+    if email.include_pdf:
+        message.attach(f"{email.project.title}.pdf",
+                       get_project_pdf(email.project), 'application/pdf')
+    return message
+
+
+def retry_later(email, error):
+    """
+    Record a failed attempt and schedule the next one, backing off
+    exponentially until the attempts run out.
+    """
+    email.attempts += 1
+    email.last_error = error
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = EmailStatus.FAILED
+    else:
+        delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+        email.next_attempt_at = (
+            timezone.now() + datetime.timedelta(seconds=delay))
+    email.save()
+
+
+def dispatch_batch(batch_size=50, connection=None):
+    """
+    Send up to `batch_size` due emails over one SMTP connection and return
+    the number of emails handled.
+
+    Rows stay locked (SKIP LOCKED) while they are sent, so concurrent
+    dispatchers never deliver the same email twice.
+    """
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .filter(status=EmailStatus.PENDING,
+                    next_attempt_at__lte=timezone.now())
+            .select_related('project')
+            .prefetch_related('project__images')
+            .order_by('id')[:batch_size]
+        )
+        if not emails:
+            return 0
+
+        connection = connection or get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            for email in emails:
+                retry_later(email, f"Could not connect: {e}")
+            return len(emails)
+
+        try:
+            for email in emails:
+                # One send_messages call per email on the shared
+                # connection, so a rejected message fails on its own.
+                try:
+                    message = build_message(email, connection)
+                    with metrics.SMTP_SEND_SECONDS.time('smtp'):
+                        connection.send_messages([message])
+                except Exception as e:
+                    retry_later(email, str(e))
+                else:
+                    email.status = EmailStatus.SENT
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+                    email.save()
+        finally:
+            connection.close()
+
+    return len(emails)
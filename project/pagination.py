@@ -0,0 +1,118 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor, CursorPagination, LimitOffsetPagination)
+
+
+def _descending(field):
+    return field.startswith('-')
+
+
+def _flip(field):
+    return field[1:] if _descending(field) else f'-{field}'
+
+
+class ProjectCursorPagination(CursorPagination):
+    """
+    Keyset pagination over a user's projects, newest first.
+
+    Pages are fetched with `WHERE created_by_id = ... AND id < ...`,
+    which the `(created_by, id)` index on `Project` answers directly,
+    so every page costs the same as the first one.
+
+    Other orderings get `id` as a tiebreaker and page on `(field, id)`,
+    answered by the `(created_by, field, id)` indexes, so projects sharing
+    a value are neither skipped nor repeated.
+    """
+    ordering = '-id'
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering[0].lstrip('-') == 'id':
+            return ordering[:1]
+        # The tiebreaker follows the first field, so one index scan in
+        # either direction answers the page.
+        return (ordering[0], '-id' if _descending(ordering[0]) else 'id')
+
+    def _after(self, ordering, position):
+        """
+        Return the condition selecting what follows `position` in
+        `ordering`.
+        """
+        fields = [field.lstrip('-') for field in ordering]
+        operators = ['lt' if _descending(field) else 'gt'
+                     for field in ordering]
+        condition = Q()
+        for i, field in enumerate(fields):
+            condition |= Q(
+                **dict(zip(fields[:i], position[:i])),
+                **{f'{field}__{operators[i]}': position[i]})
+        # Bounds the scan on the first field, which the index can use.
+        return Q(**{f'{fields[0]}__{operators[0]}e': position[0]}) & condition
+
+    def _position(self, instance):
+        return json.dumps(
+            [getattr(instance, field.lstrip('-')) for field in self.ordering],
+            cls=DjangoJSONEncoder)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = ([_flip(field) for field in self.ordering] if reverse
+                    else list(self.ordering))
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None and self.cursor.position is not None:
+            try:
+                position = json.loads(self.cursor.position)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            if (not isinstance(position, list)
+                    or len(position) != len(ordering)):
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(self._after(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=False, position=self._position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=True, position=self._position(self.page[0])))
+
+
+class ProjectSearchPagination(LimitOffsetPagination):
+    """
+    Pages of ranked search results; only the first few pages are ever
+    looked at, so plain offsets are fine here.
+    """
+    default_limit = 20
+    max_limit = 100
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+from project.utils import generate_pdf
+
+# Bump when the layout produced by `generate_pdf` changes, so renders made
+# by an older version are never served again.
+RENDER_VERSION = 3
+
+# Bytes this process believes the cache holds: the total found by its last
+# eviction scan plus what it wrote since. It only needs to be good enough
+# to decide when to scan again, so writes by other processes are left to
+# their own estimates and to the next scan.
+_size = None
+_size_lock = threading.Lock()
+# An eviction makes room below the limit, so the next scan is not due
+# after a single write.
+EVICT_TO = 0.9
+
+
+def project_fingerprint(project):
+    """
+    Return a digest of everything that ends up in the project's PDF.
+    """
+    payload = [
+        RENDER_VERSION,
+        project.id,
+        project.title,
+        project.description,
+        str(project.start_date),
+        str(project.end_date),
+        project.category_id,
+        project.priority,
+        project.status,
+        sorted((image.id, image.image.name)
+               for image in project.images.all()),
+    ]
+    return hashlib.sha256(
+        json.dumps(payload).encode('utf-8')).hexdigest()
+
+
+def _cache_dir():
+    return Path(settings.PDF_CACHE_DIR)
+
+
+def _path(project):
+    # One directory per project, so invalidating it is a single delete.
+    name = f"{project_fingerprint(project)}.pdf"
+    return _cache_dir() / str(project.id) / name
+
+
+def _read(path):
+    try:
+        pdf = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    # Refresh the modification time, which drives LRU eviction.
+    os.utime(path)
+    return pdf
+
+
+def _write(path, pdf):
+    # Write to a temporary file first so concurrent readers never see a
+    # partial PDF.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with tempfile.NamedTemporaryFile(
+                dir=path.parent, suffix='.tmp', delete=False) as tmp:
+            tmp.write(pdf)
+        os.replace(tmp.name, path)
+    except FileNotFoundError:
+        # The project was invalidated meanwhile; the render is stale.
+        return 0
+    return len(pdf)
+
+
+def _added(size):
+    """
+    Count `size` new bytes in the cache, and evict once the estimated
+    total goes past `PDF_CACHE_MAX_BYTES`. A process scans the cache on
+    its first write and after that only when the limit is crossed.
+    """
+    global _size
+    with _size_lock:
+        if _size is not None:
+            _size += size
+            if _size <= settings.PDF_CACHE_MAX_BYTES:
+                return
+    evict(int(settings.PDF_CACHE_MAX_BYTES * EVICT_TO))
+
+
+def get_project_pdf(project):
+    """
+    Return the PDF of `project` as bytes, rendering it only when no
+    render of the same content is cached.
+    """
+    path = _path(project)
+    pdf = _read(path)
+    if pdf is None:
+        pdf = generate_pdf(project).getvalue()
+        _added(_write(path, pdf))
+    return pdf
+
+
+def get_project_pdfs(projects, executor=None, return_exceptions=False):
+    """
+    Return the PDFs of `projects` in order, like `get_project_pdf`, with
+    the ones not cached rendered together by `rendering.render_many` on
+    `executor`.
+    """
+    from project import rendering
+
+    paths = [_path(project) for project in projects]
+    pdfs = [_read(path) for path in paths]
+    missing = [i for i, pdf in enumerate(pdfs) if pdf is None]
+    if not missing:
+        return pdfs
+
+    rendered = rendering.render_many(
+        [rendering.project_document(projects[i]) for i in missing],
+        executor, return_exceptions)
+    written = 0
+    for i, pdf in zip(missing, rendered):
+        if not isinstance(pdf, Exception):
+            written += _write(paths[i], pdf)
+        pdfs[i] = pdf
+    _added(written)
+    return pdfs
+
+
+def evict(max_bytes=None):
+    """
+    Delete least recently used renders until the cache fits `max_bytes`,
+    and return how many were deleted.
+
+    This scans the whole cache; renders call it only when the cache is
+    estimated to be full, and `evict_pdf_cache` runs it on demand.
+    """
+    global _size
+    if max_bytes is None:
+        max_bytes = settings.PDF_CACHE_MAX_BYTES
+
+    entries = []
+    for path in _cache_dir().glob('*/*.pdf'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total, deleted = sum(size for _, size, _ in entries), 0
+    for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        deleted += 1
+    with _size_lock:
+        _size = total
+    return deleted
+
+
+def invalidate(project_ids):
+    """
+    Drop every cached render of the given projects.
+    """
+    for project_id in set(project_ids):
+        shutil.rmtree(_cache_dir() / str(project_id), ignore_errors=True)
@@ -13,7 +13,8 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
 
         # Write permissions are only allowed to the owner of the snippet.
-        return obj.created_by == request.user
+        # Compare ids so the owner row is never fetched.
+        return obj.created_by_id == request.user.id
 
 
 class IsOwner(permissions.BasePermission):
@@ -22,4 +23,4 @@ class IsOwner(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        return obj.created_by == request.user
+        return obj.created_by_id == request.user.id
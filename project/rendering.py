@@ -0,0 +1,251 @@
+import functools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import (
+    BaseDocTemplate, Flowable, Frame, KeepTogether, PageTemplate, Paragraph,
+    Spacer, Table, TableStyle)
+
+from project import metrics
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+MARGIN_LEFT = 80
+CONTENT_WIDTH = 450
+HEADER_Y = PAGE_HEIGHT - 50
+# Images are drawn at 200x150 points, see `PDF_IMAGE_SIZE`.
+IMAGE_WIDTH, IMAGE_HEIGHT = 200, 150
+LABEL_WIDTH = 100
+
+_local = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+@functools.cache
+def styles():
+    """
+    Return the paragraph styles of project PDFs, built once per process.
+    """
+    normal = getSampleStyleSheet()['Normal']
+    return {
+        'label': ParagraphStyle(
+            'label', normal, fontName='Helvetica-Bold', fontSize=12,
+            leading=15),
+        'value': ParagraphStyle(
+            'value', normal, fontName='Helvetica', fontSize=12, leading=15),
+        'body': ParagraphStyle('body', normal, leftIndent=10),
+        'caption': ParagraphStyle(
+            'caption', normal, fontName='Helvetica-Bold', fontSize=10,
+            leading=12),
+        'error': ParagraphStyle(
+            'error', normal, fontName='Helvetica', fontSize=10, leading=12),
+    }
+
+
+FIELD_STYLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+    ('TOPPADDING', (0, 0), (-1, -1), 0),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+])
+
+
+def _draw_header(canvas, doc):
+    canvas.saveState()
+    canvas.setFont("Helvetica-Bold", 14)
+    canvas.drawString(MARGIN_LEFT, HEADER_Y,
+                      f"Project Report: {doc.project_title}")
+    canvas.line(MARGIN_LEFT, HEADER_Y - 5,
+                MARGIN_LEFT + CONTENT_WIDTH, HEADER_Y - 5)
+    canvas.restoreState()
+
+
+def page_template():
+    """
+    Return the page template of project PDFs: the header, drawn with the
+    title of the document, above one frame of content.
+
+    Frames keep layout state while a document is built, so each thread
+    reuses its own template.
+    """
+    template = getattr(_local, 'template', None)
+    if template is None:
+        frame = Frame(
+            MARGIN_LEFT, 50, CONTENT_WIDTH, HEADER_Y - 70,
+            leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+        template = _local.template = PageTemplate(
+            'project', [frame], onPage=_draw_header)
+    return template
+
+
+class _Picture(Flowable):
+    """
+    An image read ahead of the layout, so a broken file is reported in
+    place of the image instead of failing the whole document.
+    """
+
+    def __init__(self, reader):
+        super().__init__()
+        self.reader = reader
+
+    def wrap(self, available_width, available_height):
+        return IMAGE_WIDTH, IMAGE_HEIGHT
+
+    def draw(self):
+        self.canv.drawImage(
+            self.reader, 0, 0, width=IMAGE_WIDTH, height=IMAGE_HEIGHT)
+
+
+def _field(label, value):
+    table = Table(
+        [[Paragraph(label, styles()['label']),
+          Paragraph(escape(value), styles()['value'])]],
+        colWidths=[LABEL_WIDTH, CONTENT_WIDTH - LABEL_WIDTH])
+    table.setStyle(FIELD_STYLE)
+    return table
+
+
+def _image(image):
+    try:
+        if image['error']:
+            raise ValueError(image['error'])
+        reader = ImageReader(image['path'])
+        reader.getSize()
+    except Exception as e:
+        return Paragraph(
+            escape(f"Error loading image: {e}"), styles()['error'])
+    return KeepTogether([
+        _Picture(reader),
+        Spacer(0, 10),
+        Paragraph(escape(image['name']), styles()['caption']),
+        Spacer(0, 30),
+    ])
+
+
+def project_document(project):
+    """
+    Return what the PDF of `project` shows as a picklable dict, so it can
+    be rendered in a process with neither Django nor a database.
+    """
+    images = []
+    for image in project.images.all():
+        try:
+            # The downscaled copy when the upload produced one
+            path, error = (image.pdf_image or image.image).path, None
+        except Exception as e:
+            path, error = None, str(e)
+        images.append({
+            'path': path,
+            'name': image.image.name.split('/')[-1],
+            'error': error,
+        })
+    # Choices may be enum members, which would import the models on
+    # unpickling.
+    return {
+        'title': project.title,
+        'description': project.description,
+        'priority': str(project.priority),
+        'status': str(project.status),
+        'images': images,
+    }
+
+
+def render(document):
+    """
+    Render a `project_document` and return the PDF bytes.
+    """
+    story = [
+        _field("Project Title:", document['title']),
+        Paragraph("Description:", styles()['label']),
+        Spacer(0, 5),
+        Paragraph(escape(document['description']), styles()['body']),
+        Spacer(0, 15),
+        _field("Priority:", document['priority']),
+        _field("Status:", document['status']),
+        Spacer(0, 25),
+    ]
+    story += [_image(image) for image in document['images']]
+
+    buffer = BytesIO()
+    doc = BaseDocTemplate(
+        buffer, pagesize=letter, pageTemplates=[page_template()],
+        title=document['title'])
+    doc.project_title = document['title']
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def _timed_render(document):
+    """
+    `render`, also returning the seconds it took. This is the unit of
+    work sent to render processes, whose metrics are not scraped.
+    """
+    start = time.perf_counter()
+    pdf = render(document)
+    return pdf, time.perf_counter() - start
+
+
+def render_many(documents, executor=None, return_exceptions=False):
+    """
+    Render `project_document`s in parallel on `executor`, a process pool,
+    when one is given and in turn otherwise. Returns the PDFs in the order
+    of `documents`.
+
+    A failed render raises, or takes the place of its PDF when
+    `return_exceptions` is true.
+    """
+    if executor is None:
+        results = (functools.partial(_timed_render, document)
+                   for document in documents)
+    else:
+        futures = [executor.submit(_timed_render, document)
+                   for document in documents]
+        results = (future.result for future in futures)
+
+    pdfs = []
+    for result in results:
+        try:
+            pdf, seconds = result()
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            pdfs.append(e)
+            continue
+        metrics.PDF_RENDER_SECONDS.observe(seconds)
+        pdfs.append(pdf)
+    return pdfs
+
+
+def new_executor(processes):
+    """
+    Return a pool of `processes` render processes.
+
+    Renders need neither Django nor a database, so the processes are
+    spawned from a clean interpreter and skip setting Django up.
+    """
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context('spawn'))
+
+
+def get_executor():
+    """
+    Return the render pool of this process, started on first use with
+    `PDF_RENDER_PROCESSES` processes, or None when that is 0.
+    """
+    global _executor
+    if not settings.PDF_RENDER_PROCESSES:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = new_executor(settings.PDF_RENDER_PROCESSES)
+        return _executor
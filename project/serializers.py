@@ -1,6 +1,12 @@
 import json
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
-from project.models import Image, Project, ProjectCategory
+from project import category_cache
+from project.models import (
+    Image, ImageUpload, PdfExportJob, Project, ProjectCategory)
+from project.uploads import file_sha256
+from project.utils import make_pdf_image
 
 
 class ImageSerializer(serializers.ModelSerializer):
@@ -9,11 +15,32 @@ class ImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'image', 'uploaded_at']
 
 
+class CachedCategoryField(serializers.PrimaryKeyRelatedField):
+    """
+    Category reference validated against the process-local category cache
+    instead of a query per request.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+        category = category_cache.get_category(pk)
+        if category is None:
+            self.fail('does_not_exist', pk_value=data)
+        return category
+
+
 from rest_framework import serializers
 from .models import Project, Image
 
 class ProjectSerializer(serializers.ModelSerializer):
     images = ImageSerializer(many=True, read_only=True)  # For GET requests
+    category = CachedCategoryField(queryset=ProjectCategory.objects.all())
 
     class Meta:
         model = Project
@@ -26,88 +53,132 @@ class ProjectSerializer(serializers.ModelSerializer):
             'category',
             'priority',
             'status',
-            'images'
+            'images',
+            'created_at',
+            'updated_at',
         ]
 
-    def create(self, validated_data):
-        uploaded_images = [
-            file for key, file
-            in self.context['request'].FILES.items()
-            if key.startswith('uploaded_images')
-        ]
+    @staticmethod
+    def check_dates(attrs, instance=None):
+        """
+        Reject an `end_date` before the `start_date`, taking the date a
+        partial update leaves out from `instance`.
+        """
+        start_date = attrs.get(
+            'start_date', getattr(instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(instance, 'end_date', None))
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError(
+                {'end_date': "Must not be before the start date."})
+
+    def validate(self, attrs):
+        self.check_dates(attrs, self.instance)
+        return attrs
 
-        # Extract existing image IDs
-        existing_images = json.loads(self.context['request'].data.get(
-            'existing_images', "[]"))
+    def create(self, validated_data):
+        with transaction.atomic():
+            # Create the Project instance
+            instance = super().create(validated_data)
+            self.sync_images(instance)
 
-        # Create the Project instance
-        instance = super().create(validated_data)
+        return instance
 
-        # Remove images that are no longer part of the project
-        current_image_ids = [image.id for image in instance.images.all()]
-        images_to_remove = set(current_image_ids) - set(existing_images)
-
-        for image_id in images_to_remove:
-            image = instance.images.get(id=image_id)
-            instance.images.remove(image)
-
-        # Add existing images that are still part of the project
-        for image_id in existing_images:
-            try:
-                image = Image.objects.get(id=image_id)
-                instance.images.add(image)
-            except Image.DoesNotExist:
-                continue
-
-        # Add uploaded images to the instance (newly uploaded images)
-        if uploaded_images:
-            for image in uploaded_images:
-                new_image = Image.objects.create(image=image)
-                instance.images.add(new_image)
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            # Update the instance with the validated data
+            instance = super().update(instance, validated_data)
+            self.sync_images(instance)
 
         return instance
 
-    def update(self, instance, validated_data):
+    def sync_images(self, instance):
+        """
+        Make the project's images match `existing_images` plus the newly
+        uploaded files, using a fixed number of queries whatever the
+        number of images.
+        """
+        request = self.context['request']
         uploaded_images = [
             file for key, file
-            in self.context['request'].data.items()
+            in request.FILES.items()
             if key.startswith('uploaded_images')
         ]
-        print(uploaded_images, validated_data)
 
         # Extract existing image IDs
-        existing_images = json.loads(self.context['request'].data.get(
-            'existing_images', "[]"))
+        existing_images = set(json.loads(
+            request.data.get('existing_images', "[]")))
 
-        # Update the instance with the validated data
-        instance = super().update(instance, validated_data)
+        current_image_ids = set(
+            instance.images.values_list('id', flat=True))
 
         # Remove images that are no longer part of the project
-        current_image_ids = [image.id for image in instance.images.all()]
-        images_to_remove = set(current_image_ids) - set(existing_images)
-
-        for image_id in images_to_remove:
-            image = instance.images.get(id=image_id)
-            instance.images.remove(image)
-
-        # Add existing images that are still part of the project
-        for image_id in existing_images:
-            try:
-                image = Image.objects.get(id=image_id)
-                instance.images.add(image)
-            except Image.DoesNotExist:
-                continue
-
-        # Add uploaded images to the instance (newly uploaded images)
+        images_to_remove = current_image_ids - existing_images
+        if images_to_remove:
+            instance.images.remove(*images_to_remove)
+
+        # Keep only the requested images that actually exist
+        images_to_add = set(
+            Image.objects
+            .filter(id__in=existing_images - current_image_ids)
+            .values_list('id', flat=True)
+        )
+
+        # Reuse stored images with the same content, and store the others
+        # in a single insert
         if uploaded_images:
-            for image in uploaded_images:
-                new_image = Image.objects.create(image=image)
-                instance.images.add(new_image)
-
-        return instance
+            hashes = [file_sha256(image) for image in uploaded_images]
+            known = dict(
+                Image.objects
+                .filter(content_hash__in=hashes)
+                .order_by('-id')
+                .values_list('content_hash', 'id'))
+            new_images = {}
+            for image, digest in zip(uploaded_images, hashes):
+                if digest in known:
+                    images_to_add.add(known[digest])
+                elif digest not in new_images:
+                    new_images[digest] = Image(
+                        image=image, pdf_image=make_pdf_image(image),
+                        content_hash=digest)
+            new_images = Image.objects.bulk_create(new_images.values())
+            images_to_add.update(image.id for image in new_images)
+
+        if images_to_add:
+            instance.images.add(*images_to_add)
 
 
 class ProjectCategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = ProjectCategory
         fields = ['id', 'name']
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source='received', read_only=True)
+    image = ImageSerializer(read_only=True)
+
+    class Meta:
+        model = ImageUpload
+        fields = ['id', 'filename', 'size', 'offset', 'image', 'created_at']
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.IMAGE_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(
+                f"Expected between 1 and {settings.IMAGE_UPLOAD_MAX_BYTES} "
+                "bytes.")
+        return value
+
+
+class PdfExportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PdfExportJob
+        fields = [
+            'id',
+            'project',
+            'status',
+            'progress',
+            'error',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
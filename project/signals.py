@@ -0,0 +1,161 @@
+import threading
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+
+from project import category_cache, pdf_cache, stats
+from project.models import Image, Project, ProjectCategory
+
+_batch = threading.local()
+
+
+class PendingUpdates:
+    """
+    Statistics and PDF cache updates collected during a batch.
+    """
+
+    def __init__(self):
+        self.removed = []
+        self.added = []
+        self.pdf_project_ids = set()
+
+    def apply(self):
+        if self.removed or self.added:
+            stats.apply_changes(removed=self.removed, added=self.added)
+        pdf_cache.invalidate(self.pdf_project_ids)
+
+
+@contextmanager
+def batched_project_updates():
+    """
+    Collect the side effects of project changes made in the block and
+    apply them together when it exits without error.
+
+    Bulk operations bypass signals, so callers record their own changes
+    on the yielded `PendingUpdates`.
+    """
+    pending = _batch.pending = PendingUpdates()
+    try:
+        yield pending
+    finally:
+        _batch.pending = None
+    pending.apply()
+
+
+def _pending():
+    return getattr(_batch, 'pending', None)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_pdf(sender, instance, **kwargs):
+    """
+    Drop cached PDFs of a project that changed or was deleted.
+    """
+    pending = _pending()
+    if pending is not None:
+        pending.pdf_project_ids.add(instance.pk)
+    else:
+        pdf_cache.invalidate([instance.pk])
+
+
+@receiver(m2m_changed, sender=Project.images.through)
+def invalidate_project_pdf_images(sender, instance, action, reverse,
+                                  pk_set, **kwargs):
+    """
+    Drop cached PDFs when images are attached to or detached from projects.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if not reverse:
+        pdf_cache.invalidate([instance.pk])
+    elif action == 'pre_clear':
+        # Clearing from the image side does not report the projects, so
+        # look them up while the links still exist.
+        pdf_cache.invalidate(
+            instance.project_set.values_list('id', flat=True))
+    else:
+        pdf_cache.invalidate(pk_set)
+
+
+@receiver(post_save, sender=Image)
+@receiver(pre_delete, sender=Image)
+def invalidate_image_projects_pdf(sender, instance, created=False, **kwargs):
+    """
+    Drop cached PDFs of every project showing an image that changed.
+    """
+    if created:
+        return
+    pdf_cache.invalidate(instance.project_set.values_list('id', flat=True))
+
+
+@receiver(pre_save, sender=Project)
+def snapshot_project_stats(sender, instance, **kwargs):
+    """
+    Load what the statistics counted an existing project as, when it was
+    not loaded along with the instance.
+    """
+    if instance.pk is None or getattr(instance, '_stats_snapshot', None):
+        return
+    stored = Project.objects.filter(pk=instance.pk).first()
+    instance._stats_snapshot = stored and stored.stats_snapshot()
+
+
+@receiver(post_save, sender=Project)
+def update_project_stats(sender, instance, created, **kwargs):
+    """
+    Move a saved project between the counters of the dashboard statistics.
+    """
+    old = None if created else getattr(instance, '_stats_snapshot', None)
+    new = instance.stats_snapshot()
+    if new is None:
+        new = Project.objects.get(pk=instance.pk).stats_snapshot()
+    if old != new:
+        removed = [old] if old else []
+        pending = _pending()
+        if pending is not None:
+            pending.removed += removed
+            pending.added.append(new)
+        else:
+            stats.apply_changes(removed=removed, added=[new])
+    instance._stats_snapshot = new
+
+
+@receiver(post_delete, sender=Project)
+def remove_project_stats(sender, instance, **kwargs):
+    """
+    Stop counting a deleted project in the dashboard statistics.
+    """
+    snapshot = instance.stats_snapshot()
+    if snapshot is None:
+        return
+    pending = _pending()
+    if pending is not None:
+        pending.removed.append(snapshot)
+    else:
+        stats.apply_changes(removed=[snapshot])
+
+
+@receiver(post_save, sender=ProjectCategory)
+@receiver(post_delete, sender=ProjectCategory)
+def invalidate_categories(sender, **kwargs):
+    """
+    Invalidate cached categories once the change is visible to others.
+    """
+    transaction.on_commit(category_cache.bump_version)
+
+
+@receiver(post_migrate, sender=apps.get_app_config('project'))
+def create_cache_table(using, **kwargs):
+    """
+    Create the table of the database cache, the default shared `CACHES`
+    backend, with the rest of the schema, so `migrate` alone leaves the
+    category and token caches working.
+    """
+    call_command('createcachetable', database=using, verbosity=0)
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.urls import get_resolver
+
+# What the first request of a worker loads, after the WSGI entrypoint.
+FIRST_REQUEST_CODE = (
+    "from django.urls import get_resolver; get_resolver().url_patterns")
+
+
+def warm_up():
+    """
+    Load what the first request of a worker would otherwise pay for: the
+    URLconf with every view, and the PDF engine with its styles.
+
+    The WSGI and ASGI modules call it when `WARM_UP_WORKERS` is set, so
+    it runs once before fork when the server preloads the application. It
+    opens no connection, as those do not survive a fork.
+    """
+    from project import rendering
+
+    get_resolver().url_patterns
+    rendering.styles()
+
+
+def parse_importtime(output):
+    """
+    Return `(module, self µs, cumulative µs)` for every import reported
+    by `python -X importtime`.
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            imports.append(
+                (fields[2].strip(), int(fields[0]), int(fields[1])))
+        except (IndexError, ValueError):
+            # The header line
+            continue
+    return imports
+
+
+def profile_imports(warm=False):
+    """
+    Start a fresh interpreter the way a web worker starts, by importing
+    the `WSGI_APPLICATION` module with `WARM_UP_WORKERS` set if `warm`,
+    and return its imports up to the first request as `parse_importtime`
+    does, with the seconds the start took.
+
+    Raises `subprocess.CalledProcessError` if the interpreter fails.
+    """
+    entrypoint = settings.WSGI_APPLICATION.rsplit('.', 1)[0]
+    code = f"import {entrypoint}; {FIRST_REQUEST_CODE}"
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE,
+               WARM_UP_WORKERS='1' if warm else '0')
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=settings.BASE_DIR, env=env,
+        check=True)
+    return parse_importtime(result.stderr), time.perf_counter() - start
@@ -0,0 +1,86 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from project.models import Project, ProjectSnapshot, ProjectStats, STATS_FIELDS
+
+ProjectStatus = Project.ProjectStatus
+
+
+def _add(counts, key, delta):
+    key = str(key)
+    count = counts.get(key, 0) + delta
+    if count:
+        counts[key] = count
+    else:
+        counts.pop(key, None)
+
+
+def _count(stats, snapshot, delta):
+    stats.total += delta
+    _add(stats.by_status, snapshot.status, delta)
+    _add(stats.by_priority, snapshot.priority, delta)
+    _add(stats.by_category, snapshot.category_id, delta)
+    if snapshot.status != ProjectStatus.DONE:
+        _add(stats.open_end_dates, snapshot.end_date.isoformat(), delta)
+
+
+def apply_changes(removed=(), added=()):
+    """
+    Update the statistics for projects that stopped being counted as the
+    `removed` snapshots and started being counted as the `added` ones.
+
+    Each affected user's row is locked and written once.
+    """
+    changes = defaultdict(list)
+    for snapshot in removed:
+        changes[snapshot.created_by_id].append((snapshot, -1))
+    for snapshot in added:
+        changes[snapshot.created_by_id].append((snapshot, 1))
+
+    with transaction.atomic():
+        if added:
+            # Only additions create rows: deletions may come from a user
+            # being deleted, whose row must not be recreated.
+            ProjectStats.objects.bulk_create(
+                [ProjectStats(user_id=snapshot.created_by_id)
+                 for snapshot in added],
+                ignore_conflicts=True)
+
+        for stats in (ProjectStats.objects
+                      .select_for_update()
+                      .filter(user_id__in=changes)):
+            for snapshot, delta in changes[stats.user_id]:
+                _count(stats, snapshot, delta)
+            stats.save()
+
+
+def rebuild(user_ids=None):
+    """
+    Recompute the statistics from the projects table, for every user or
+    only `user_ids`.
+    """
+    projects = Project.objects.all()
+    if user_ids is not None:
+        projects = projects.filter(created_by__in=user_ids)
+
+    rows = {}
+    # Group identical snapshots in the database instead of loading every
+    # project.
+    for values in projects.values(*STATS_FIELDS).annotate(count=Count('id')):
+        count = values.pop('count')
+        snapshot = ProjectSnapshot(**values)
+        stats = rows.setdefault(
+            snapshot.created_by_id,
+            ProjectStats(user_id=snapshot.created_by_id))
+        _count(stats, snapshot, count)
+
+    with transaction.atomic():
+        existing = ProjectStats.objects.all()
+        if user_ids is not None:
+            existing = existing.filter(user_id__in=user_ids)
+        existing.delete()
+        ProjectStats.objects.bulk_create(rows.values())
+
+    return len(rows)
@@ -1,3 +1,2301 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.postgres.fields.ranges import DateRange
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from oauth2_provider.models import AccessToken, Application
+from rest_framework.test import APIClient
+
+from project import (
+    category_cache, pdf_cache, rendering, startup, stats, uploads)
+from project.ai_summary import SummaryCache, get_session, summary_cache
+from project.jobs import claim_jobs, process_jobs
+from project.models import (
+    Image, ImageUpload, OutboundEmail, PdfExportJob, Project,
+    ProjectCategory, ProjectStats, project_span)
+from project.outbox import dispatch_batch
+from user.authentication import token_cache
+from user.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+PDF_CACHE_DIR = os.path.join(MEDIA_ROOT, 'pdf_cache')
+
+
+def make_projects(user, category, count, images_per_project=2):
+    """
+    Create `count` projects owned by `user`, each with its own images.
+    """
+    projects = []
+    for i in range(count):
+        project = Project.objects.create(
+            title=f"Project {i}",
+            description=f"Description of project {i}",
+            start_date=datetime.date(2024, 1, 1),
+            end_date=datetime.date(2024, 12, 31),
+            category=category,
+            created_by=user,
+        )
+        for j in range(images_per_project):
+            project.images.add(
+                Image.objects.create(image=f"project_images/{i}_{j}.png"))
+        projects.append(project)
+    return projects
+
+
+def pdf_title(pdf):
+    return re.search(rb'/Title \((.*?)\)', pdf).group(1).decode()
+
+
+def make_upload(name="photo.png", size=(40, 30)):
+    """
+    Return an in-memory PNG upload, whose content depends on `name`.
+    """
+    from PIL import Image as PILImage
+
+    buffer = BytesIO()
+    color = tuple(hashlib.sha256(name.encode()).digest()[:3])
+    PILImage.new("RGB", size, color).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+
+class ProjectListPaginationTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pagination_walks_every_project_once(self):
+        projects = make_projects(self.user, self.category, 7, 0)
+
+        seen = []
+        url = reverse('project-list') + '?page_size=3'
+        while url:
+            response = self.client.get(url)
+            seen += [project['id'] for project in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(seen, sorted((p.id for p in projects), reverse=True))
+
+    def test_orderings_with_ties_page_on_the_id_too(self):
+        projects = make_projects(self.user, self.category, 7, 0)
+        Project.objects.filter(id__in=[p.id for p in projects[2:5]]).update(
+            status=Project.ProjectStatus.DONE)
+
+        seen, pages = [], []
+        url = reverse('project-list') + '?ordering=status&page_size=2'
+        with CaptureQueriesContext(connection) as ctx:
+            while url:
+                response = self.client.get(url)
+                pages.append(response.data)
+                seen += [project['id'] for project in response.data['results']]
+                url = response.data['next']
+
+        self.assertEqual(seen, [p.id for p in projects[2:5]] +
+                         [p.id for p in projects[:2] + projects[5:]])
+        self.assertFalse(any('OFFSET' in query['sql']
+                             for query in ctx.captured_queries))
+
+        # Walking back from the last page gives the same pages.
+        back = []
+        url = pages[-1]['previous']
+        while url:
+            response = self.client.get(url)
+            back.insert(0, [p['id'] for p in response.data['results']])
+            url = response.data['previous']
+        self.assertEqual(
+            back, [[p['id'] for p in page['results']] for page in pages[:-1]])
+
+    def test_only_own_projects_are_listed(self):
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password")
+        make_projects(other, self.category, 3, 0)
+
+        response = self.client.get(reverse('project-list'))
+
+        self.assertEqual(response.data['results'], [])
+
+
+class ProjectListFilterTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.research = ProjectCategory.objects.create(name="Research")
+        self.sales = ProjectCategory.objects.create(name="Sales")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        Status = Project.ProjectStatus
+        Priority = Project.ProjectPriority
+        self.projects = {}
+        for name, category, status, priority, start in [
+            ('alpha', self.research, Status.DONE, Priority.HIGH, 1),
+            ('beta', self.research, Status.WAITING, Priority.LOW, 2),
+            ('gamma', self.sales, Status.IN_PROGRESS, Priority.HIGH, 3),
+            ('delta', self.sales, Status.WAITING, Priority.CRITICAL, 4),
+        ]:
+            self.projects[name] = Project.objects.create(
+                title=name, description=name, category=category,
+                status=status, priority=priority, created_by=self.user,
+                start_date=datetime.date(2024, start, 1),
+                end_date=datetime.date(2024, start + 6, 1))
+
+    def titles(self, **params):
+        response = self.client.get(reverse('project-list'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [project['title'] for project in response.data['results']]
+
+    def test_filter_by_choices_and_category(self):
+        self.assertEqual(self.titles(status='Waiting'), ['delta', 'beta'])
+        self.assertEqual(self.titles(priority='High,Critical'),
+                         ['delta', 'gamma', 'alpha'])
+        self.assertEqual(
+            self.titles(category=self.research.id, priority='High'),
+            ['alpha'])
+
+    def test_filter_by_date_ranges(self):
+        self.assertEqual(
+            self.titles(start_date_after='2024-02-01',
+                        start_date_before='2024-03-01'),
+            ['gamma', 'beta'])
+        self.assertEqual(self.titles(end_date_before='2024-08-01'),
+                         ['beta', 'alpha'])
+
+    def test_ordering(self):
+        self.assertEqual(self.titles(ordering='start_date'),
+                         ['alpha', 'beta', 'gamma', 'delta'])
+        self.assertEqual(self.titles(ordering='-end_date'),
+                         ['delta', 'gamma', 'beta', 'alpha'])
+
+    def test_priority_orders_by_rank(self):
+        self.assertEqual(self.titles(ordering='priority'),
+                         ['beta', 'alpha', 'gamma', 'delta'])
+        self.assertEqual(self.titles(ordering='-priority'),
+                         ['delta', 'gamma', 'alpha', 'beta'])
+
+    def test_invalid_filters_are_rejected(self):
+        for params in ({'status': 'Sleeping'}, {'category': 'sales'},
+                       {'start_date_after': 'yesterday'}):
+            response = self.client.get(reverse('project-list'), params)
+            self.assertEqual(response.status_code, 400)
+
+
+class ProjectSearchTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_project(self, title, description, user=None):
+        return Project.objects.create(
+            title=title, description=description, category=self.category,
+            created_by=user or self.user,
+            start_date=datetime.date(2024, 1, 1),
+            end_date=datetime.date(2024, 12, 31))
+
+    def search(self, q):
+        response = self.client.get(reverse('project-search'), {'q': q})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [project['title'] for project in response.data['results']]
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.make_project("Warehouse audit", "Count the stock of the garden")
+        self.make_project("Garden redesign", "Replant the beds")
+        self.make_project("Payroll", "Monthly salaries")
+
+        self.assertEqual(self.search("garden"),
+                         ["Garden redesign", "Warehouse audit"])
+
+    def test_prefixes_and_stems_match(self):
+        self.make_project("Planning offsite", "Book a venue")
+
+        self.assertEqual(self.search("plan"), ["Planning offsite"])
+        self.assertEqual(self.search("offs ven"), ["Planning offsite"])
+        self.assertEqual(self.search("plan payroll"), [])
+
+    def test_search_vector_follows_edits(self):
+        project = self.make_project("Old name", "Nothing")
+        project.title = "Renamed project"
+        project.save()
+
+        self.assertEqual(self.search("renamed"), ["Renamed project"])
+        self.assertEqual(self.search("old"), [])
+
+    def test_only_own_projects_are_searched(self):
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password")
+        self.make_project("Garden", "Theirs", user=other)
+
+        self.assertEqual(self.search("garden"), [])
+
+    def test_query_is_required(self):
+        response = self.client.get(reverse('project-search'), {'q': ' & '})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class ProjectTimelineTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_project(self, title, start, end, user=None, **fields):
+        return Project.objects.create(
+            title=title, description=title, category=self.category,
+            created_by=user or self.user,
+            start_date=datetime.date.fromisoformat(start),
+            end_date=datetime.date.fromisoformat(end), **fields)
+
+    def timeline(self, start='2024-03-01', end='2024-03-31', **params):
+        return self.client.get(
+            reverse('project-timeline'), {'start': start, 'end': end, **params})
+
+    def test_returns_overlapping_projects_as_columns(self):
+        before = self.make_project("before", '2024-01-01', '2024-02-29')
+        spanning = self.make_project("spanning", '2024-02-15', '2024-04-15')
+        edge = self.make_project(
+            "edge", '2024-03-31', '2024-05-01',
+            status=Project.ProjectStatus.DONE)
+        self.make_project("after", '2024-04-01', '2024-04-30')
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password")
+        self.make_project("theirs", '2024-03-01', '2024-03-02', user=other)
+
+        response = self.timeline()
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertNotIn(before.id, response.data['ids'])
+        statuses = response.data['status_choices']
+        self.assertEqual(response.data['ids'], [spanning.id, edge.id])
+        self.assertEqual(response.data['titles'], ["spanning", "edge"])
+        self.assertEqual(response.data['start_offsets'], [-15, 30])
+        self.assertEqual(response.data['end_offsets'], [45, 61])
+        self.assertEqual(
+            [statuses[i] for i in response.data['statuses']],
+            ['Waiting', 'Done'])
+
+    def test_list_filters_apply(self):
+        self.make_project("waiting", '2024-03-01', '2024-03-10')
+        done = self.make_project(
+            "done", '2024-03-01', '2024-03-10',
+            status=Project.ProjectStatus.DONE)
+
+        response = self.timeline(status='Done')
+
+        self.assertEqual(response.data['ids'], [done.id])
+
+    def test_invalid_windows_are_rejected(self):
+        self.assertEqual(self.timeline(start='March').status_code, 400)
+        self.assertEqual(
+            self.timeline(start='2024-03-02', end='2024-03-01').status_code,
+            400)
+        with self.settings(PROJECT_TIMELINE_MAX_DAYS=10):
+            self.assertEqual(self.timeline().status_code, 400)
+
+    def test_projects_ending_before_they_start_are_rejected(self):
+        project = self.make_project("kept", '2024-03-01', '2024-03-31')
+        data = {
+            'title': "Backwards", 'description': "Backwards",
+            'start_date': "2024-03-31", 'end_date': "2024-03-01",
+            'category': self.category.id,
+        }
+
+        response = self.client.post(reverse('project-list'), data)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('end_date', response.data)
+
+        response = self.client.patch(
+            reverse('project-detail', args=[project.id]),
+            {'end_date': "2024-02-01"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('end_date', response.data)
+
+        response = self.client.post(reverse('project-batch'), {'operations': [
+            {'op': 'create', 'data': data},
+            {'op': 'update', 'id': project.id,
+             'data': {'start_date': "2024-04-01"}},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [list(result['errors']) for result in response.data['results']],
+            [['end_date'], ['end_date']])
+
+        self.assertEqual(list(Project.objects.values_list('title', flat=True)),
+                         ["kept"])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.make_project("constrained", '2024-03-31', '2024-03-01')
+
+    def test_overlap_query_uses_the_range_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = (
+            Project.objects
+            .annotate(span=project_span())
+            .filter(span__overlap=DateRange(
+                datetime.date(2024, 3, 1), datetime.date(2024, 3, 31), '[]'))
+            .explain()
+        )
+
+        self.assertIn('project_span_idx', plan)
+
+
+class ProjectStatsTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.research = ProjectCategory.objects.create(name="Research")
+        self.sales = ProjectCategory.objects.create(name="Sales")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_project(self, end_date, **fields):
+        return Project.objects.create(
+            title="Project", description="Description",
+            category=self.research, created_by=self.user,
+            start_date=datetime.date(2000, 1, 1), end_date=end_date,
+            **fields)
+
+    def get_stats(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('project-stats'))
+        self.assertEqual(len(ctx.captured_queries), 1)
+        return response.data
+
+    def test_counters_follow_creates_updates_and_deletes(self):
+        past = datetime.date(2000, 6, 1)
+        future = datetime.date(2999, 1, 1)
+        late = self.make_project(past)
+        done = self.make_project(past, status='Done', priority='High')
+        self.make_project(future)
+
+        data = self.get_stats()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['by_status']['Waiting'], 2)
+        self.assertEqual(data['by_status']['Done'], 1)
+        self.assertEqual(data['by_priority']['High'], 1)
+        self.assertEqual(data['by_category'], {str(self.research.id): 3})
+        self.assertEqual(data['overdue'], 1)
+
+        late.status = 'Done'
+        late.category = self.sales
+        late.save()
+        done.delete()
+
+        data = self.get_stats()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['by_status']['Done'], 1)
+        self.assertEqual(data['by_priority']['High'], 0)
+        self.assertEqual(data['by_category'], {
+            str(self.research.id): 1, str(self.sales.id): 1})
+        self.assertEqual(data['overdue'], 0)
+
+    def test_api_writes_update_the_counters(self):
+        response = self.client.post(reverse('project-list'), {
+            'title': "Project", 'description': "Description",
+            'start_date': "2024-01-01", 'end_date': "2024-02-01",
+            'category': self.research.id, 'status': 'In Progress',
+        })
+        self.assertEqual(self.get_stats()['by_status']['In Progress'], 1)
+
+        self.client.delete(
+            reverse('project-detail', args=[response.data['id']]))
+        self.assertEqual(self.get_stats()['total'], 0)
+
+    def test_rebuild_matches_incremental_counters(self):
+        for month in range(1, 6):
+            self.make_project(datetime.date(2000, month, 1),
+                              status='Done' if month % 2 else 'Waiting')
+        incremental = ProjectStats.objects.get(user=self.user)
+
+        ProjectStats.objects.all().delete()
+        stats.rebuild()
+        rebuilt = ProjectStats.objects.get(user=self.user)
+
+        for field in ('total', 'by_status', 'by_priority', 'by_category',
+                      'open_end_dates'):
+            self.assertEqual(getattr(rebuilt, field),
+                             getattr(incremental, field))
+
+    def test_users_without_projects_get_zeros(self):
+        data = self.get_stats()
+
+        self.assertEqual(data['total'], 0)
+        self.assertEqual(set(data['by_status'].values()), {0})
+
+    def test_deleting_a_user_removes_their_stats(self):
+        self.make_project(datetime.date(2000, 1, 1))
+
+        self.user.delete()
+
+        self.assertFalse(ProjectStats.objects.exists())
+
+
+class ProjectCategoryCacheTest(TestCase):
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = ProjectCategory.objects.create(name="Research")
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_categories_are_not_modified(self):
+        response = self.client.get(reverse('project-category-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data,
+                         [{'id': self.category.id, 'name': "Research"}])
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(
+                reverse('project-category-list'),
+                HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+
+    def test_changes_produce_a_new_etag(self):
+        etag = self.client.get(reverse('project-category-list'))['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectCategory.objects.create(name="Sales")
+
+        response = self.client.get(
+            reverse('project-category-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_other_processes_changes_are_seen_after_the_ttl(self):
+        etag = self.client.get(reverse('project-category-list'))['ETag']
+        # Another process adds a category and bumps the shared version.
+        ProjectCategory.objects.create(name="Sales")
+        cache.set(category_cache.VERSION_KEY, "bumped elsewhere", None)
+
+        response = self.client.get(
+            reverse('project-category-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        later = time.monotonic() + settings.PROJECT_CATEGORY_CACHE_TTL
+        with mock.patch('project.category_cache.time.monotonic',
+                        return_value=later):
+            response = self.client.get(
+                reverse('project-category-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_migrate_creates_the_cache_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE django_cache')
+
+        emit_post_migrate_signal(0, False, 'default')
+
+        self.assertIn('django_cache', connection.introspection.table_names())
+        cache.set('project:check', 1)
+        self.assertEqual(cache.get('project:check'), 1)
+
+    def test_project_category_is_validated_from_the_cache(self):
+        data = {
+            'title': "Project", 'description': "Description",
+            'start_date': "2024-01-01", 'end_date': "2024-02-01",
+            'category': self.category.id,
+        }
+        self.client.get(reverse('project-category-list'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('project-list'), data)
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertFalse(any('project_projectcategory' in query['sql']
+                             for query in ctx.captured_queries))
+
+        data['category'] = 999999
+        response = self.client.post(reverse('project-list'), data)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('category', response.data)
+
+
+class ProjectConditionalGetTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.project, self.other = make_projects(self.user, self.category, 2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_project_is_not_modified(self):
+        url = reverse('project-detail', args=[self.project.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('updated_at', response.data)
+
+        with self.assertNumQueries(1):
+            by_etag = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'])
+        by_date = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_date.status_code, 304)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_updated_project_is_sent_again(self):
+        url = reverse('project-detail', args=[self.project.id])
+        etag = self.client.get(url)['ETag']
+
+        self.project.status = 'Done'
+        self.project.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'Done')
+
+    def test_conditional_requests_still_check_ownership(self):
+        url = reverse('project-detail', args=[self.project.id])
+        etag = self.client.get(url)['ETag']
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password")
+        self.client.force_authenticate(other)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_unchanged_list_is_not_modified(self):
+        url = reverse('project-list') + '?status=Waiting'
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertNotEqual(
+            self.client.get(reverse('project-list'))['ETag'], etag)
+
+    def test_list_changes_after_update_and_delete(self):
+        url = reverse('project-list')
+        etag = self.client.get(url)['ETag']
+
+        self.other.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        self.project.title = "Renamed"
+        self.project.save()
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ProjectBatchTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        category_cache.get_category(self.category.id)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_op(self, title):
+        return {'op': 'create', 'data': {
+            'title': title, 'description': "Imported",
+            'start_date': "2024-01-01", 'end_date': "2024-06-30",
+            'category': self.category.id}}
+
+    def batch(self, operations):
+        return self.client.post(reverse('project-batch'),
+                                {'operations': operations}, format='json')
+
+    def test_mixed_operations_are_applied(self):
+        updated, deleted = make_projects(self.user, self.category, 2, 0)
+
+        response = self.batch([
+            self.create_op("Imported one"),
+            {'op': 'update', 'id': updated.id, 'data': {'status': 'Done'}},
+            {'op': 'delete', 'id': deleted.id},
+            self.create_op("Imported two"),
+        ])
+
+        self.assertEqual(response.status_code, 200, response.data)
+        results = response.data['results']
+        self.assertEqual([result['op'] for result in results],
+                         ['create', 'update', 'delete', 'create'])
+        self.assertEqual(
+            Project.objects.get(id=results[0]['id']).title, "Imported one")
+        updated.refresh_from_db()
+        self.assertEqual(updated.status, 'Done')
+        self.assertFalse(Project.objects.filter(id=deleted.id).exists())
+
+        user_stats = ProjectStats.objects.get(user=self.user)
+        self.assertEqual(user_stats.total, 3)
+        self.assertEqual(user_stats.by_status, {'Waiting': 2, 'Done': 1})
+        self.assertEqual(
+            Project.objects.filter(search_vector='imported').count(), 2)
+
+    def test_invalid_batch_applies_nothing(self):
+        project, = make_projects(self.user, self.category, 1, 0)
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password")
+        theirs, = make_projects(other, self.category, 1, 0)
+
+        response = self.batch([
+            self.create_op("Fine"),
+            {'op': 'update', 'id': project.id, 'data': {'status': 'Nope'}},
+            {'op': 'delete', 'id': theirs.id},
+            {'op': 'rename'},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['skipped', 'error', 'error', 'error'])
+        self.assertEqual(Project.objects.count(), 2)
+
+    def test_boolean_ids_are_not_found(self):
+        made, = make_projects(self.user, self.category, 1, 0)
+        # The project true would stand for
+        Project.objects.filter(id=made.id).update(id=1)
+        project = Project.objects.get(id=1)
+
+        response = self.batch([
+            {'op': 'update', 'id': True, 'data': {'title': "Renamed"}},
+            {'op': 'delete', 'id': False},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [result['errors'] for result in response.data['results']],
+            [{'id': "Not found."}, {'id': "Not found."}])
+        project.refresh_from_db()
+        self.assertNotEqual(project.title, "Renamed")
+
+    def test_body_must_be_an_object(self):
+        for body in ([self.create_op("Listed")], "operations", 42):
+            response = self.client.post(
+                reverse('project-batch'), body, format='json')
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('detail', response.data)
+        self.assertFalse(Project.objects.exists())
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def count(size):
+            projects = make_projects(self.user, self.category, size, 0)
+            operations = [self.create_op(f"New {i}") for i in range(size)]
+            operations += [
+                {'op': 'update', 'id': project.id,
+                 'data': {'priority': 'High'}}
+                for project in projects
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.batch(operations)
+            self.assertEqual(response.status_code, 200, response.data)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(count(3), count(40))
+
+
+class ProjectReadQueriesTest(TestCase):
+    """
+    The project read paths must not issue one query per project or image.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_project_list_query_count_is_constant(self):
+        make_projects(self.user, self.category, 2)
+        small = self.count_queries(reverse('project-list'))
+
+        make_projects(self.user, self.category, 20, images_per_project=5)
+        large = self.count_queries(reverse('project-list'))
+
+        self.assertEqual(small, large)
+
+    def test_project_list_includes_images(self):
+        make_projects(self.user, self.category, 3)
+
+        response = self.client.get(reverse('project-list'))
+
+        for project in response.data['results']:
+            self.assertEqual(len(project['images']), 2)
+
+    def test_project_list_page_query_count_is_constant(self):
+        make_projects(self.user, self.category, 60)
+        url = reverse('project-list') + '?page_size=10'
+        first = self.count_queries(url)
+        for _ in range(5):
+            url = self.client.get(url).data['next']
+
+        self.assertEqual(first, self.count_queries(url))
+
+    def test_project_detail_query_count_is_constant(self):
+        few, = make_projects(self.user, self.category, 1)
+        many, = make_projects(
+            self.user, self.category, 1, images_per_project=10)
+
+        self.assertEqual(
+            self.count_queries(reverse('project-detail', args=[few.id])),
+            self.count_queries(reverse('project-detail', args=[many.id])),
+        )
+
+    def test_project_detail_rejects_other_users(self):
+        project, = make_projects(self.user, self.category, 1)
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password")
+        self.client.force_authenticate(other)
+
+        response = self.client.get(
+            reverse('project-detail', args=[project.id]))
+
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ProjectImageSyncTest(TestCase):
+    """
+    Saving a project costs the same number of queries whatever the number
+    of images involved.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Load the category cache so it does not skew query counts.
+        category_cache.get_category(self.category.id)
+
+    def project_data(self, existing_images=(), uploads=0):
+        data = {
+            'title': "Project",
+            'description': "Description",
+            'start_date': "2024-01-01",
+            'end_date': "2024-12-31",
+            'category': self.category.id,
+            'existing_images': json.dumps(list(existing_images)),
+        }
+        for i in range(uploads):
+            data[f'uploaded_images[{i}]'] = make_upload(f"photo{i}.png")
+        return data
+
+    def count_save_queries(self, method, url, data):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(
+                url, data, format='multipart')
+        self.assertIn(response.status_code, (200, 201), response.data)
+        return len(ctx.captured_queries), response
+
+    def test_create_attaches_existing_and_uploaded_images(self):
+        existing = [Image.objects.create(image=f"project_images/{i}.png")
+                    for i in range(2)]
+
+        _, response = self.count_save_queries(
+            'post', reverse('project-list'),
+            self.project_data([image.id for image in existing] + [999999], 2))
+
+        project = Project.objects.get(id=response.data['id'])
+        self.assertEqual(project.images.count(), 4)
+        self.assertTrue(
+            set(image.id for image in existing) <=
+            set(project.images.values_list('id', flat=True)))
+
+    def test_uploads_get_a_downscaled_pdf_image(self):
+        data = self.project_data()
+        data['uploaded_images[0]'] = make_upload("large.png", (2400, 1800))
+
+        _, response = self.count_save_queries(
+            'post', reverse('project-list'), data)
+
+        from PIL import Image as PILImage
+
+        image = Project.objects.get(id=response.data['id']).images.get()
+        with PILImage.open(image.image.path) as original:
+            self.assertEqual(original.size, (2400, 1800))
+        with PILImage.open(image.pdf_image.path) as derivative:
+            self.assertEqual(derivative.size, (400, 300))
+
+    def test_create_query_count_is_constant(self):
+        few, _ = self.count_save_queries(
+            'post', reverse('project-list'), self.project_data(uploads=1))
+        many, _ = self.count_save_queries(
+            'post', reverse('project-list'), self.project_data(uploads=8))
+
+        self.assertEqual(few, many)
+
+    def test_update_replaces_image_membership(self):
+        project, = make_projects(
+            self.user, self.category, 1, images_per_project=6)
+        kept = list(project.images.values_list('id', flat=True)[:3])
+        url = reverse('project-detail', args=[project.id])
+
+        self.count_save_queries('put', url, self.project_data(kept, 2))
+
+        self.assertEqual(project.images.count(), 5)
+        self.assertTrue(
+            set(kept) <= set(project.images.values_list('id', flat=True)))
+
+    def test_update_query_count_is_constant(self):
+        small, big = make_projects(self.user, self.category, 2, 0)
+        small_images = [Image.objects.create(image=f"project_images/s{i}.png")
+                        for i in range(2)]
+        big_images = [Image.objects.create(image=f"project_images/b{i}.png")
+                      for i in range(20)]
+        small.images.add(*small_images)
+        big.images.add(*big_images)
+
+        few, _ = self.count_save_queries(
+            'put', reverse('project-detail', args=[small.id]),
+            self.project_data([small_images[0].id], 1))
+        many, _ = self.count_save_queries(
+            'put', reverse('project-detail', args=[big.id]),
+            self.project_data([image.id for image in big_images[:10]], 5))
+
+        self.assertEqual(few, many)
+
+    def test_identical_uploads_share_one_image(self):
+        data = self.project_data()
+        data['uploaded_images[0]'] = make_upload("same.png")
+        data['uploaded_images[1]'] = make_upload("same.png")
+        _, first = self.count_save_queries(
+            'post', reverse('project-list'), data)
+
+        data = self.project_data()
+        data['uploaded_images[0]'] = make_upload("same.png")
+        _, second = self.count_save_queries(
+            'post', reverse('project-list'), data)
+
+        self.assertEqual(Image.objects.count(), 1)
+        self.assertEqual(first.data['images'], second.data['images'])
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    IMAGE_UPLOAD_DIR=os.path.join(MEDIA_ROOT, 'image_uploads'))
+class ImageUploadTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        from PIL import Image as PILImage
+
+        # Noise does not compress, so the file spans several chunks.
+        buffer = BytesIO()
+        PILImage.frombytes("RGB", (100, 100), os.urandom(30000)).save(
+            buffer, "PNG")
+        self.content = buffer.getvalue()
+
+    def start(self, size=None):
+        response = self.client.post(
+            reverse('image-upload-list'),
+            {'filename': "large.png", 'size': size or len(self.content)},
+            format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return reverse('image-upload-detail', args=[response.data['id']])
+
+    def send(self, url, offset, chunk):
+        return self.client.patch(
+            url, chunk, content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset))
+
+    def upload(self, content, chunk_size=1000):
+        url = self.start(len(content))
+        for offset in range(0, len(content), chunk_size):
+            response = self.send(
+                url, offset, content[offset:offset + chunk_size])
+            self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def test_chunks_are_assembled_into_an_image(self):
+        response = self.upload(self.content)
+
+        image = Image.objects.get(id=response.data['image']['id'])
+        self.assertEqual(response.data['offset'], len(self.content))
+        self.assertEqual(image.content_hash,
+                         hashlib.sha256(self.content).hexdigest())
+        with open(image.image.path, 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertTrue(image.pdf_image)
+        upload = ImageUpload.objects.get()
+        self.assertFalse(os.path.exists(upload.path))
+
+    def test_upload_resumes_from_the_stored_offset(self):
+        url = self.start()
+        self.send(url, 0, self.content[:1000])
+
+        response = self.send(url, 2000, self.content[2000:])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '1000')
+
+        # Another process holds no hash state and rebuilds it from disk.
+        uploads._hashers.clear()
+        response = self.send(url, 1000, self.content[1000:])
+
+        self.assertEqual(response.status_code, 200, response.data)
+        image = Image.objects.get(id=response.data['image']['id'])
+        self.assertEqual(image.content_hash,
+                         hashlib.sha256(self.content).hexdigest())
+
+    def test_bytes_read_before_a_failure_are_kept(self):
+        url = self.start()
+        upload = ImageUpload.objects.get()
+
+        class Dropped(BytesIO):
+            def read(self, size=-1):
+                data = super().read(size)
+                if not data:
+                    raise OSError("Client went away")
+                return data
+
+        with self.assertRaises(OSError):
+            uploads.append_chunk(
+                upload.id, self.user, 0, Dropped(self.content[:1000]),
+                len(self.content))
+        upload.refresh_from_db()
+        self.assertEqual(upload.received, 1000)
+
+        response = self.send(url, 1000, self.content[1000:])
+        self.assertEqual(response.status_code, 200, response.data)
+        image = Image.objects.get(id=response.data['image']['id'])
+        self.assertEqual(image.content_hash,
+                         hashlib.sha256(self.content).hexdigest())
+
+    def test_chunks_stream_outside_a_transaction(self):
+        self.start()
+        upload = ImageUpload.objects.get()
+        depth = len(connection.atomic_blocks)
+        test = self
+
+        class Watched(BytesIO):
+            def read(self, size=-1):
+                test.assertEqual(len(connection.atomic_blocks), depth)
+                # A second chunk of the upload is turned away meanwhile.
+                with test.assertRaises(uploads.OffsetMismatch):
+                    uploads.append_chunk(
+                        upload.id, test.user, 0, BytesIO(b"x"), 1)
+                return super().read(size)
+
+        uploads.append_chunk(
+            upload.id, self.user, 0, Watched(self.content[:1000]), 1000)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.received, 1000)
+
+    def test_duplicate_content_reuses_the_image(self):
+        first = self.upload(self.content)
+        second = self.upload(self.content, chunk_size=5000)
+
+        self.assertEqual(first.data['image']['id'],
+                         second.data['image']['id'])
+        self.assertEqual(Image.objects.count(), 1)
+
+    def test_uploaded_image_can_be_attached_to_a_project(self):
+        image_id = self.upload(self.content).data['image']['id']
+        category = ProjectCategory.objects.create(name="Research")
+
+        response = self.client.post(reverse('project-list'), {
+            'title': "Project",
+            'description': "Description",
+            'start_date': "2024-01-01",
+            'end_date': "2024-12-31",
+            'category': category.id,
+            'existing_images': json.dumps([image_id]),
+        }, format='multipart')
+
+        self.assertEqual(
+            [image['id'] for image in response.data['images']], [image_id])
+
+    def test_content_that_is_not_an_image_is_rejected(self):
+        content = b"not an image" * 100
+        response = self.send(self.start(len(content)), 0, content)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertFalse(Image.objects.exists())
+
+    def test_chunks_past_the_declared_size_are_rejected(self):
+        url = self.start(10)
+
+        self.assertEqual(self.send(url, 0, b"x" * 11).status_code, 400)
+
+    def test_uploads_of_other_users_are_hidden(self):
+        url = self.start()
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password")
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.send(url, 0, b"x").status_code, 404)
+
+    def test_stale_uploads_are_purged(self):
+        url = self.start()
+        self.send(url, 0, self.content[:1000])
+        upload = ImageUpload.objects.get()
+        ImageUpload.objects.update(
+            updated_at=timezone.now() - datetime.timedelta(days=2))
+
+        self.assertEqual(uploads.purge_stale(), 1)
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertFalse(os.path.exists(upload.path))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, PDF_CACHE_DIR=PDF_CACHE_DIR)
+class PdfExportJobTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.project, = make_projects(self.user, self.category, 1, 0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_export_enqueues_a_job(self):
+        response = self.client.get(
+            reverse('export_project_pdf', args=[self.project.id]))
+
+        self.assertEqual(response.status_code, 202)
+        job = PdfExportJob.objects.get(id=response.data['id'])
+        self.assertEqual(job.status, PdfExportJob.JobStatus.QUEUED)
+        self.assertEqual(response.data['status_url'],
+                         reverse('pdf_export_job_status', args=[job.id]))
+
+    def test_worker_renders_claimed_jobs(self):
+        response = self.client.get(
+            reverse('export_project_pdf', args=[self.project.id]))
+
+        jobs = claim_jobs(10)
+        self.assertEqual(claim_jobs(10), [])
+        process_jobs(jobs)
+
+        status_response = self.client.get(response.data['status_url'])
+        self.assertEqual(status_response.data['status'], 'Done')
+        self.assertEqual(status_response.data['progress'], 100)
+
+        download = self.client.get(status_response.data['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(b''.join(download.streaming_content)
+                        .startswith(b'%PDF'))
+
+    def test_worker_renders_on_a_process_pool(self):
+        others = make_projects(self.user, self.category, 2, 0)
+        for project in [self.project] + others:
+            self.client.get(reverse('export_project_pdf', args=[project.id]))
+        jobs = claim_jobs(10)
+
+        with rendering.new_executor(2) as executor:
+            process_jobs(jobs, executor)
+
+        with mock.patch('project.pdf_cache.generate_pdf') as render:
+            for job in PdfExportJob.objects.filter(
+                    id__in=[j.id for j in jobs]):
+                self.assertEqual(job.status, PdfExportJob.JobStatus.DONE)
+                self.assertEqual(
+                    pdf_title(pdf_cache.get_project_pdf(job.project)),
+                    job.project.title)
+        render.assert_not_called()
+
+    def test_jobs_of_a_dead_worker_are_claimed_again(self):
+        self.client.get(reverse('export_project_pdf', args=[self.project.id]))
+        job, = claim_jobs(10)
+        self.assertEqual(claim_jobs(10), [])
+
+        for attempt in range(2, 4):
+            PdfExportJob.objects.filter(id=job.id).update(
+                started_at=timezone.now() - datetime.timedelta(hours=1))
+            job, = claim_jobs(10)
+            self.assertEqual(job.attempts, attempt)
+
+        PdfExportJob.objects.filter(id=job.id).update(
+            started_at=timezone.now() - datetime.timedelta(hours=1))
+        self.assertEqual(claim_jobs(10), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, PdfExportJob.JobStatus.FAILED)
+
+    def test_jobs_lost_with_the_pool_are_queued_again(self):
+        self.client.get(reverse('export_project_pdf', args=[self.project.id]))
+        jobs = claim_jobs(10)
+        executor = mock.Mock()
+        executor.submit.side_effect = BrokenProcessPool("gone")
+
+        with self.assertRaises(BrokenProcessPool):
+            process_jobs(jobs, executor)
+
+        job = PdfExportJob.objects.get(id=jobs[0].id)
+        self.assertEqual(job.status, PdfExportJob.JobStatus.QUEUED)
+        self.assertEqual(claim_jobs(10), [job])
+
+    def test_download_before_completion_is_refused(self):
+        response = self.client.get(
+            reverse('export_project_pdf', args=[self.project.id]))
+
+        download = self.client.get(
+            reverse('download_pdf_export', args=[response.data['id']]))
+
+        self.assertEqual(download.status_code, 409)
+
+    def test_jobs_are_private_to_their_requester(self):
+        response = self.client.get(
+            reverse('export_project_pdf', args=[self.project.id]))
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password")
+        self.client.force_authenticate(other)
+
+        self.assertEqual(
+            self.client.get(response.data['status_url']).status_code, 404)
+        self.assertEqual(self.client.get(
+            reverse('download_pdf_export', args=[response.data['id']]),
+        ).status_code, 404)
+
+    def test_only_owners_can_export_a_project(self):
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password")
+        self.client.force_authenticate(other)
+
+        response = self.client.get(
+            reverse('export_project_pdf', args=[self.project.id]))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(PdfExportJob.objects.exists())
+
+    def test_download_serves_the_cached_render(self):
+        response = self.client.get(
+            reverse('export_project_pdf', args=[self.project.id]))
+        process_jobs(claim_jobs(10))
+
+        with mock.patch('project.pdf_cache.generate_pdf') as render:
+            download = self.client.get(
+                reverse('download_pdf_export', args=[response.data['id']]))
+            pdf = b''.join(download.streaming_content)
+
+        render.assert_not_called()
+        self.assertEqual(pdf_title(pdf), self.project.title)
+        self.assertFalse(
+            os.path.exists(os.path.join(MEDIA_ROOT, 'pdf_exports')))
+
+    def test_finished_jobs_are_purged(self):
+        old, recent, queued = (
+            PdfExportJob.objects.create(
+                project=self.project, requested_by=self.user,
+                status=status, finished_at=finished_at)
+            for status, finished_at in [
+                (PdfExportJob.JobStatus.DONE,
+                 timezone.now() - datetime.timedelta(days=8)),
+                (PdfExportJob.JobStatus.FAILED, timezone.now()),
+                (PdfExportJob.JobStatus.QUEUED, None),
+            ])
+        stdout = StringIO()
+
+        call_command('purge_pdf_exports', stdout=stdout)
+
+        self.assertIn("Deleted 1 job(s).", stdout.getvalue())
+        self.assertEqual(set(PdfExportJob.objects.all()), {recent, queued})
+
+
+class PdfCacheTest(TestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        settings_override = override_settings(PDF_CACHE_DIR=cache_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.cache_dir = Path(cache_dir)
+
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.project, = make_projects(self.user, self.category, 1, 0)
+        # The size estimate of this process belongs to another directory.
+        pdf_cache._size = None
+        self.addCleanup(setattr, pdf_cache, '_size', None)
+
+    def test_unchanged_project_is_rendered_once(self):
+        with mock.patch('project.pdf_cache.generate_pdf',
+                        wraps=pdf_cache.generate_pdf) as render:
+            first = pdf_cache.get_project_pdf(self.project)
+            second = pdf_cache.get_project_pdf(self.project)
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith(b'%PDF'))
+
+    def test_project_changes_invalidate_the_render(self):
+        other, = make_projects(self.user, self.category, 1, 0)
+        pdf_cache.get_project_pdf(other)
+        pdf_cache.get_project_pdf(self.project)
+
+        self.project.title = "Renamed"
+        self.project.save()
+        self.assertEqual(list(self.cache_dir.glob(f'{self.project.id}/*')), [])
+        self.assertEqual(len(list(self.cache_dir.glob('*/*.pdf'))), 1)
+
+        pdf_cache.get_project_pdf(self.project)
+        self.project.images.add(
+            Image.objects.create(image="project_images/new.png"))
+        self.assertEqual(list(self.cache_dir.glob(f'{self.project.id}/*')), [])
+
+    def test_fingerprint_follows_images(self):
+        before = pdf_cache.project_fingerprint(self.project)
+        self.project.images.add(
+            Image.objects.create(image="project_images/new.png"))
+
+        self.assertNotEqual(before, pdf_cache.project_fingerprint(
+            Project.objects.get(id=self.project.id)))
+
+    def test_least_recently_used_renders_are_evicted(self):
+        others = make_projects(self.user, self.category, 2, 0)
+        pdf_cache.get_project_pdf(self.project)
+        for project in others:
+            pdf_cache.get_project_pdf(project)
+        oldest = min(self.cache_dir.glob('*/*.pdf'),
+                     key=lambda path: path.stat().st_mtime)
+        os.utime(oldest, (0, 0))
+        sizes = [path.stat().st_size for path in self.cache_dir.glob('*/*.pdf')]
+
+        pdf_cache.evict(sum(sizes) - 1)
+
+        self.assertFalse(oldest.exists())
+        self.assertEqual(len(list(self.cache_dir.glob('*/*.pdf'))), 2)
+
+    def test_cache_is_scanned_only_when_full(self):
+        others = make_projects(self.user, self.category, 3, 0)
+        with mock.patch('project.pdf_cache.evict',
+                        wraps=pdf_cache.evict) as evict:
+            # The first write of a process measures the cache.
+            pdf_cache.get_project_pdf(self.project)
+            pdf_cache.get_project_pdf(others[0])
+            self.assertEqual(evict.call_count, 1)
+
+            size = sum(path.stat().st_size
+                       for path in self.cache_dir.glob('*/*.pdf'))
+            with self.settings(PDF_CACHE_MAX_BYTES=size + 1):
+                pdf_cache.get_project_pdfs(others[1:])
+            self.assertEqual(evict.call_count, 2)
+
+        self.assertLessEqual(
+            sum(path.stat().st_size
+                for path in self.cache_dir.glob('*/*.pdf')), size + 1)
+
+    def test_evict_pdf_cache_command(self):
+        pdf_cache.get_project_pdf(self.project)
+        stdout = StringIO()
+
+        call_command('evict_pdf_cache', max_bytes=0, stdout=stdout)
+
+        self.assertIn("Deleted 1 render(s).", stdout.getvalue())
+        self.assertEqual(list(self.cache_dir.glob('*/*.pdf')), [])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, PDF_CACHE_DIR=PDF_CACHE_DIR)
+class PdfRenderingTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.projects = make_projects(self.user, self.category, 4, 1)
+        self.documents = [rendering.project_document(project)
+                          for project in self.projects]
+
+    def test_pdfs_come_back_in_order(self):
+        titles = [project.title for project in self.projects]
+
+        inline = rendering.render_many(self.documents)
+        with rendering.new_executor(2) as executor:
+            pooled = rendering.render_many(self.documents, executor)
+
+        self.assertEqual([pdf_title(pdf) for pdf in inline], titles)
+        self.assertEqual([pdf_title(pdf) for pdf in pooled], titles)
+
+    def test_failed_renders_can_take_the_place_of_their_pdf(self):
+        self.documents[1]['description'] = None
+
+        pdfs = rendering.render_many(
+            self.documents, return_exceptions=True)
+
+        self.assertIsInstance(pdfs[1], Exception)
+        self.assertEqual(pdf_title(pdfs[2]), self.projects[2].title)
+        with self.assertRaises(Exception):
+            rendering.render_many(self.documents)
+
+    def test_content_flows_onto_new_pages(self):
+        project = self.projects[0]
+        project.description = "A long description. " * 2000
+        project.images.add(Image.objects.create(image=make_upload()))
+        # The image of `make_projects` has no file.
+        document = rendering.project_document(project)
+
+        pdf = rendering.render(document)
+
+        self.assertGreater(len(re.findall(rb'/Type /Page\b', pdf)), 1)
+        self.assertIn(b'/Subtype /Image', pdf)
+
+    def test_batches_reuse_cached_renders(self):
+        first = pdf_cache.get_project_pdfs(self.projects[:2])
+        with mock.patch('project.rendering.render_many',
+                        wraps=rendering.render_many) as render_many:
+            second = pdf_cache.get_project_pdfs(self.projects)
+
+        self.assertEqual(second[:2], first)
+        self.assertEqual(
+            len(render_many.call_args.args[0]), len(self.projects) - 2)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, PDF_CACHE_DIR=PDF_CACHE_DIR)
+class ProjectZipExportTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.projects = make_projects(self.user, self.category, 3, 0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_archive(self, **params):
+        response = self.client.get(reverse('export_projects_zip'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+
+    def test_archive_contains_one_pdf_per_project(self):
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password")
+        make_projects(other, self.category, 2, 0)
+
+        archive = self.get_archive()
+
+        self.assertEqual(
+            archive.namelist(),
+            [f"project_{project.id}.pdf" for project in self.projects])
+        for name in archive.namelist():
+            self.assertTrue(archive.read(name).startswith(b'%PDF'))
+
+    def test_archive_can_be_limited_to_ids(self):
+        wanted = self.projects[1]
+
+        archive = self.get_archive(ids=f"{wanted.id}")
+
+        self.assertEqual(archive.namelist(), [f"project_{wanted.id}.pdf"])
+
+    @override_settings(PDF_RENDER_PROCESSES=2)
+    def test_archive_is_rendered_on_the_render_pool(self):
+        with rendering.new_executor(2) as executor, \
+                mock.patch('project.rendering.get_executor',
+                           return_value=executor):
+            archive = self.get_archive()
+
+        self.assertEqual(
+            archive.namelist(),
+            [f"project_{project.id}.pdf" for project in self.projects])
+
+    async def test_archive_is_streamed_over_asgi(self):
+        application = await Application.objects.acreate(
+            user=self.user,
+            client_type=Application.CLIENT_CONFIDENTIAL,
+            authorization_grant_type=Application.GRANT_PASSWORD,
+        )
+        await AccessToken.objects.acreate(
+            user=self.user, application=application, token="token",
+            expires=timezone.now() + datetime.timedelta(hours=1),
+            scope="read write")
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+
+        with mock.patch('project.archive.get_project_pdfs',
+                        wraps=pdf_cache.get_project_pdfs) as render:
+            response = await AsyncClient().get(
+                reverse('export_projects_zip'),
+                headers={'Authorization': "Bearer token"})
+            self.assertTrue(response.is_async)
+            chunks = response.streaming_content
+            first = await anext(chunks)
+            # Only the first project was rendered to send the first chunk.
+            self.assertEqual(render.call_count, 1)
+            content = first + b''.join([chunk async for chunk in chunks])
+
+        archive = zipfile.ZipFile(BytesIO(content))
+        self.assertEqual(
+            archive.namelist(),
+            [f"project_{project.id}.pdf" for project in self.projects])
+
+    def test_invalid_ids_are_rejected(self):
+        response = self.client.get(
+            reverse('export_projects_zip'), {'ids': 'one,two'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """
+    Minimal local SMTP server recording connections and received messages.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, reject=()):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.reject = set(reject)
+        self.connections = 0
+        self.messages = []
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 stand-in ready")
+        recipients = []
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply("250 stand-in")
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip(' <>')
+                if address in self.server.reject:
+                    self.reply("550 mailbox unavailable")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == 'DATA':
+                self.reply("354 go ahead")
+                data = b''.join(iter(self.rfile.readline, b".\r\n"))
+                self.server.messages.append((recipients, data))
+                recipients = []
+                self.reply("250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 bye")
+                return
+            else:
+                if verb == 'RSET':
+                    recipients = []
+                self.reply("250 OK")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, PDF_CACHE_DIR=PDF_CACHE_DIR)
+class EmailOutboxTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.project, = make_projects(self.user, self.category, 1, 0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def send(self, *emails, include_pdf=False):
+        return self.client.get(
+            reverse('send_project_email', args=[self.project.id]),
+            {'email': list(emails), 'include_pdf': str(include_pdf).lower()})
+
+    def test_email_is_queued_for_every_recipient(self):
+        response = self.send("a@example.com,b@example.com", "c@example.com")
+
+        self.assertEqual(response.status_code, 202)
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.recipients,
+                         ["a@example.com", "b@example.com", "c@example.com"])
+        self.assertEqual(mail.outbox, [])
+
+    def test_invalid_recipients_are_rejected(self):
+        self.assertEqual(self.send().status_code, 400)
+        self.assertEqual(self.send("not-an-address").status_code, 400)
+        with self.settings(PROJECT_EMAIL_MAX_RECIPIENTS=2):
+            self.assertEqual(self.send(
+                "a@example.com", "b@example.com,c@example.com",
+            ).status_code, 400)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_only_owners_can_email_a_project(self):
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="password")
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self.send("a@example.com").status_code, 404)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_dispatch_sends_due_emails_with_pdf(self):
+        self.send("a@example.com", include_pdf=True)
+        self.send("b@example.com")
+
+        self.assertEqual(dispatch_batch(), 2)
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].attachments[0][2], 'application/pdf')
+        self.assertEqual(mail.outbox[1].attachments, [])
+        self.assertEqual(
+            set(OutboundEmail.objects.values_list('status', flat=True)),
+            {OutboundEmail.EmailStatus.SENT})
+        self.assertEqual(dispatch_batch(), 0)
+
+    @override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+        EMAIL_HOST='127.0.0.1', EMAIL_USE_TLS=False,
+        EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+        EMAIL_OUTBOX_RETRY_DELAY=60)
+    def test_batch_reuses_one_smtp_connection_and_retries_failures(self):
+        for address in ("a@example.com", "bounce@example.com",
+                        "c@example.com"):
+            self.send(address)
+
+        with SMTPStandIn(reject={"bounce@example.com"}) as server:
+            with self.settings(EMAIL_PORT=server.server_address[1]):
+                dispatch_batch()
+
+        self.assertEqual(server.connections, 1)
+        self.assertEqual([recipients for recipients, _ in server.messages],
+                         [["a@example.com"], ["c@example.com"]])
+
+        bounced = OutboundEmail.objects.get(
+            recipients=["bounce@example.com"])
+        self.assertEqual(bounced.status, OutboundEmail.EmailStatus.PENDING)
+        self.assertEqual(bounced.attempts, 1)
+        self.assertGreater(bounced.next_attempt_at, bounced.created_at)
+        self.assertEqual(dispatch_batch(), 0)
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_email_fails_after_max_attempts(self):
+        self.send("a@example.com")
+        broken = mock.Mock(**{'open.side_effect': OSError("refused")})
+
+        dispatch_batch(connection=broken)
+        OutboundEmail.objects.update(next_attempt_at=datetime.datetime(
+            2000, 1, 1, tzinfo=datetime.timezone.utc))
+        dispatch_batch(connection=broken)
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, OutboundEmail.EmailStatus.FAILED)
+        self.assertEqual(email.attempts, 2)
+
+
+class AIDescriptionSummaryCacheTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        summary_cache.clear()
+        self.addCleanup(summary_cache.clear)
+
+    def summarize(self, description="A tool to plan projects."):
+        return self.client.post(
+            reverse('generate_ai_description_summary'),
+            {'project_description': description, 'project_title': "Planner"},
+            format='json')
+
+    def upstream(self, text="A summary."):
+        response = mock.Mock()
+        response.json.return_value = [{'generated_text': text}]
+        return mock.patch.object(get_session(), 'post',
+                                 return_value=response)
+
+    def test_identical_prompts_share_one_upstream_call(self):
+        with self.upstream() as post:
+            first = self.summarize()
+            second = self.summarize()
+            self.summarize("Something else.")
+
+        self.assertEqual(first.data, {'description': "A summary."})
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(post.call_count, 2)
+        self.assertEqual(summary_cache.stats()['hits'], 1)
+        self.assertEqual(summary_cache.stats()['misses'], 2)
+
+    def test_upstream_errors_are_not_cached(self):
+        import requests
+
+        timeout = requests.exceptions.Timeout("slow")
+        with mock.patch.object(get_session(), 'post', side_effect=timeout):
+            self.assertEqual(self.summarize().status_code, 500)
+        with self.upstream():
+            self.assertEqual(self.summarize().status_code, 200)
+
+    def test_non_json_answers_are_reported(self):
+        with self.upstream() as post:
+            post.return_value.json.side_effect = ValueError("Not JSON")
+            response = self.summarize()
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('error', response.data)
+
+    def test_stats_are_admin_only(self):
+        url = reverse('ai_description_summary_stats')
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(set(self.client.get(url).data),
+                         {'hits', 'misses', 'coalesced', 'size'})
+
+
+class SummaryCacheTest(TestCase):
+
+    def test_concurrent_misses_are_coalesced(self):
+        cache = SummaryCache(max_entries=10, ttl=60)
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    cache.get_or_compute("prompt", compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        while cache.stats()['coalesced'] < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, ["value"] * 5)
+
+    def test_entries_expire_and_least_recently_used_are_evicted(self):
+        cache = SummaryCache(max_entries=2, ttl=60)
+        with mock.patch('project.ai_summary.time.monotonic', return_value=0):
+            cache.get_or_compute("a", lambda: 1)
+            cache.get_or_compute("b", lambda: 2)
+            cache.get_or_compute("a", lambda: 0)
+            cache.get_or_compute("c", lambda: 3)
+
+            self.assertEqual(cache.get_or_compute("a", lambda: 0), 1)
+            self.assertEqual(cache.get_or_compute("b", lambda: 0), 0)
+
+        with mock.patch('project.ai_summary.time.monotonic', return_value=61):
+            self.assertEqual(cache.get_or_compute("a", lambda: 10), 10)
+
+
+class InferenceStub(ThreadingHTTPServer):
+    """
+    Local stand-in for the Hugging Face inference API.
+    """
+    daemon_threads = True
+
+    def __init__(self, delay=0, status=200, body=None):
+        super().__init__(('127.0.0.1', 0), InferenceStubHandler)
+        self.delay = delay
+        self.status = status
+        self.body = body
+        self.prompts = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+class InferenceStubHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        prompt = json.loads(body)['inputs']
+        self.server.prompts.append(prompt)
+        time.sleep(self.server.delay)
+        payload = self.server.body or json.dumps(
+            [{'generated_text': f"Summary of: {prompt}"}])
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class AsyncAIDescriptionSummaryTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        application = Application.objects.create(
+            user=self.user,
+            client_type=Application.CLIENT_CONFIDENTIAL,
+            authorization_grant_type=Application.GRANT_PASSWORD,
+        )
+        AccessToken.objects.create(
+            user=self.user, application=application, token="token",
+            expires=timezone.now() + datetime.timedelta(hours=1),
+            scope="read write")
+        self.client = AsyncClient()
+        summary_cache.clear()
+        self.addCleanup(summary_cache.clear)
+
+    def summarize(self, description, token="token"):
+        return self.client.post(
+            reverse('async_generate_ai_description_summary'),
+            {'project_description': description},
+            content_type='application/json',
+            headers={'Authorization': f"Bearer {token}"})
+
+    async def test_summary_comes_from_the_inference_api(self):
+        with InferenceStub() as stub:
+            with self.settings(HUGGINGFACE_API_URL=stub.url):
+                response = await self.summarize("Plan things.")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Plan things.", response.json()['description'])
+        self.assertEqual(len(stub.prompts), 1)
+
+    async def test_concurrent_requests_share_one_upstream_call(self):
+        with InferenceStub(delay=0.2) as stub:
+            with self.settings(HUGGINGFACE_API_URL=stub.url):
+                responses = await asyncio.gather(
+                    *(self.summarize("Same project.") for _ in range(5)),
+                    self.summarize("Other project."))
+
+        self.assertEqual([r.status_code for r in responses], [200] * 6)
+        self.assertEqual(sorted(stub.prompts), sorted(set(stub.prompts)))
+        self.assertEqual(len(stub.prompts), 2)
+
+    async def test_upstream_errors_are_reported(self):
+        with InferenceStub(status=503) as stub:
+            with self.settings(HUGGINGFACE_API_URL=stub.url):
+                response = await self.summarize("Plan things.")
+
+        self.assertEqual(response.status_code, 500)
+
+    async def test_non_json_answers_are_reported(self):
+        with InferenceStub(body="<html>Bad gateway</html>") as stub:
+            with self.settings(HUGGINGFACE_API_URL=stub.url):
+                response = await self.summarize("Plan things.")
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('error', response.json())
+
+    async def test_authentication_is_required(self):
+        response = await self.summarize("Plan things.", token="expired")
+
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sample(self, name, **labels):
+        """
+        Return the value of one sample on the metrics endpoint, 0 if absent.
+        """
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        wanted = name + (
+            '{%s}' % ','.join(f'{k}="{v}"' for k, v in labels.items())
+            if labels else '')
+        for line in response.content.decode().splitlines():
+            sample, _, value = line.rpartition(' ')
+            if sample == wanted:
+                return float(value)
+        return 0
+
+    def test_requests_are_timed_per_view_with_their_queries(self):
+        make_projects(self.user, self.category, 3)
+        before = self.sample(
+            'http_request_duration_seconds_count',
+            view='project-list', method='GET', status='200')
+        queries_before = self.sample(
+            'http_request_db_queries_sum', view='project-list')
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('project-list'))
+        # Read before the next request resets the query log.
+        queries = len(ctx.captured_queries)
+
+        self.assertEqual(self.sample(
+            'http_request_duration_seconds_count',
+            view='project-list', method='GET', status='200'), before + 1)
+        self.assertEqual(
+            self.sample('http_request_db_queries_sum', view='project-list'),
+            queries_before + queries)
+
+    @override_settings(METRICS_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('project-list'))
+
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+
+    @override_settings(METRICS_SERVER_TIMING=True)
+    def test_external_calls_are_timed(self):
+        upstream = mock.Mock()
+        upstream.json.return_value = [{'generated_text': "A summary."}]
+        before = self.sample(
+            'ai_summary_request_duration_seconds_count', outcome='ok')
+        summary_cache.clear()
+        self.addCleanup(summary_cache.clear)
+
+        with mock.patch.object(get_session(), 'post',
+                               return_value=upstream):
+            response = self.client.post(
+                reverse('generate_ai_description_summary'),
+                {'project_description': "Timed"}, format='json')
+
+        self.assertIn('hf;dur=', response['Server-Timing'])
+        self.assertEqual(self.sample(
+            'ai_summary_request_duration_seconds_count', outcome='ok'),
+            before + 1)
+        self.assertEqual(self.sample('ai_summary_cache_misses'), 1)
+
+    def test_pdf_rendering_is_timed(self):
+        from project.utils import generate_pdf
+
+        project, = make_projects(self.user, self.category, 1, 0)
+        before = self.sample('pdf_render_duration_seconds_count')
+
+        generate_pdf(project)
+
+        self.assertEqual(
+            self.sample('pdf_render_duration_seconds_count'), before + 1)
+
+    def test_token_protects_the_endpoint(self):
+        client = APIClient()
+
+        self.assertEqual(client.get(reverse('metrics')).status_code, 401)
+        self.assertEqual(client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        ).status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_endpoint_is_closed_without_a_token(self):
+        client = APIClient()
+
+        self.assertEqual(client.get(reverse('metrics')).status_code, 403)
+        with self.settings(METRICS_PUBLIC=True):
+            self.assertEqual(client.get(reverse('metrics')).status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BenchmarkCommandTest(TestCase):
+
+    def test_seed_and_run_write_comparable_results(self):
+        output = os.path.join(MEDIA_ROOT, 'benchmarks.json')
+        call_command('seed_benchmark_data', users=2, projects=5,
+                     image_pool=2, stdout=StringIO())
+
+        self.assertEqual(Project.objects.count(), 10)
+        self.assertEqual(Image.objects.count(), 20)
+        self.assertEqual(ProjectStats.objects.get(
+            user__username='bench-user-0').total, 5)
+
+        call_command('run_benchmarks', sizes='2,5', repeat=1,
+                     output=output, stdout=StringIO())
+        with open(output) as f:
+            report = json.load(f)
+        self.assertEqual(set(report['results']), {
+            'generate_pdf',
+            'project_serializer.dump[2]', 'project_serializer.load[2]',
+            'project_serializer.dump[5]', 'project_serializer.load[5]',
+            'project_list[2]', 'project_list[5]',
+            'signup_serializer.validate', 'signup_serializer.create',
+        })
+        self.assertEqual(report['dataset']['projects'], 5)
+        self.assertFalse(User.objects.filter(
+            username__startswith='signup-bench-').exists())
+
+        # A baseline a hundred times as fast is a regression.
+        for result in report['results'].values():
+            result['median'] /= 100
+        with open(output, 'w') as f:
+            json.dump(report, f)
+        with self.assertRaises(CommandError):
+            call_command('run_benchmarks', sizes='2', repeat=1,
+                         only='project_list', compare=output,
+                         stdout=StringIO())
+
+
+class StartupTest(TestCase):
+
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   json.decoder\n"
+            "import time:       300 |        420 | json\n"
+            "unrelated line\n")
+
+        self.assertEqual(startup.parse_importtime(output), [
+            ('json.decoder', 120, 120), ('json', 300, 420)])
+
+    def test_workers_load_pdf_image_and_http_libraries_on_first_use(self):
+        # Through project_planning_tool.wsgi, which warms up only when
+        # WARM_UP_WORKERS is set.
+        imports, _ = startup.profile_imports()
+        modules = {module for module, _, _ in imports}
+        self.assertIn('project.views', modules)
+        self.assertNotIn('reportlab', modules)
+        self.assertNotIn('httpx', modules)
+        self.assertNotIn('PIL.Image', modules)
+
+        imports, _ = startup.profile_imports(warm=True)
+        modules = {module for module, _, _ in imports}
+        self.assertIn('reportlab.lib.styles', modules)
+
+    def test_profile_startup_command(self):
+        output = os.path.join(MEDIA_ROOT, 'startup.json')
+        stdout = StringIO()
+        call_command('profile_startup', limit=3, output=output,
+                     stdout=stdout)
+
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertIn("modules imported in", lines[-1])
+        with open(output) as f:
+            report = json.load(f)
+        self.assertIn('django', {
+            row['module'] for row in report['imports']})
+
+    def test_pdf_styles_are_built_once(self):
+        self.assertIs(rendering.styles(), rendering.styles())
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    PDF_CACHE_DIR=PDF_CACHE_DIR,
+    IMAGE_UPLOAD_DIR=os.path.join(MEDIA_ROOT, 'image_uploads'),
+    # The category version is not checked again in the middle of a test.
+    PROJECT_CATEGORY_CACHE_TTL=60 * 60,
+)
+class QueryBudgetTest(TestCase):
+    """
+    Every URL of project/urls.py runs a fixed number of SQL queries,
+    whatever the number of projects, images and users.
+    """
+    SIZES = (3, 30)
+    # Most queries allowed per request, by URL name and method.
+    BUDGETS = {
+        ('project-list', 'GET'): 3,
+        ('project-list', 'POST'): 17,
+        ('project-search', 'GET'): 3,
+        ('project-batch', 'POST'): 11,
+        ('project-stats', 'GET'): 1,
+        ('project-timeline', 'GET'): 1,
+        ('project-detail', 'GET'): 3,
+        ('project-detail', 'PUT'): 13,
+        ('project-detail', 'PATCH'): 9,
+        ('project-detail', 'DELETE'): 10,
+        ('project-category-list', 'GET'): 0,
+        ('image-upload-list', 'POST'): 1,
+        ('image-upload-detail', 'GET'): 1,
+        ('image-upload-detail', 'PATCH'): 6,
+        ('image-upload-detail', 'DELETE'): 2,
+        ('generate_ai_description_summary', 'POST'): 0,
+        ('async_generate_ai_description_summary', 'POST'): 1,
+        ('ai_description_summary_stats', 'GET'): 0,
+        ('export_project_pdf', 'GET'): 2,
+        ('export_projects_zip', 'GET'): 2,
+        ('pdf_export_job_status', 'GET'): 1,
+        ('download_pdf_export', 'GET'): 2,
+        ('send_project_email', 'GET'): 2,
+        ('metrics', 'GET'): 0,
+        ('index', 'GET'): 0,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.templates = tempfile.mkdtemp()
+        with open(os.path.join(cls.templates, 'index.html'), 'w') as f:
+            f.write("<div id='root'></div>")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.templates, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password",
+            is_staff=True)
+        self.other = User.objects.create_user(
+            username="other", email="other@example.com", password="password")
+        self.category = ProjectCategory.objects.create(name="Research")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Load the category cache so it does not skew query counts.
+        category_cache.get_category(self.category.id)
+        summary_cache.clear()
+        self.addCleanup(summary_cache.clear)
+
+    def grow(self, size):
+        """
+        Give the user and another user `size` projects each, and return
+        the user's newest project.
+        """
+        for owner in (self.user, self.other):
+            make_projects(
+                owner, self.category, size - owner.projects.count())
+        return self.user.projects.order_by('-id').first()
+
+    def assert_budget(self, name, method, send, prepare=None):
+        """
+        Check that `send(target)` runs the same number of queries at every
+        data size, within the budget of the URL. `target` is the user's
+        newest project, or what `prepare(project)` returns for it.
+        """
+        # Start from no projects, so each size is measured as seeded.
+        Project.objects.all().delete()
+        counts = []
+        for size in self.SIZES:
+            project = self.grow(size)
+            target = prepare(project) if prepare else project
+            with CaptureQueriesContext(connection) as ctx:
+                response = send(target)
+                if getattr(response, 'streaming', False):
+                    b''.join(response.streaming_content)
+            self.assertLess(response.status_code, 400,
+                            getattr(response, 'data', response))
+            counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(counts[0], counts[-1],
+                         f"{method} {name} grows with the data: {counts}")
+        self.assertLessEqual(counts[-1], self.BUDGETS[name, method],
+                             f"{method} {name} is over budget")
+
+    def project_data(self, project):
+        return {
+            'title': "Budget",
+            'description': "Within budget",
+            'start_date': "2024-01-01",
+            'end_date': "2024-12-31",
+            'category': self.category.id,
+            'existing_images': json.dumps(
+                list(project.images.values_list('id', flat=True))),
+            'uploaded_images[0]': make_upload(f"budget{project.id}.png"),
+        }
+
+    def test_every_url_has_a_budget(self):
+        from project.urls import urlpatterns
+
+        self.assertEqual(
+            {pattern.name for pattern in urlpatterns},
+            {name for name, _ in self.BUDGETS})
+
+    def test_projects(self):
+        url = reverse('project-list')
+        self.assert_budget('project-list', 'GET',
+                           lambda project: self.client.get(url))
+        self.assert_budget('project-list', 'POST', lambda project: (
+            self.client.post(url, self.project_data(project),
+                             format='multipart')))
+        self.assert_budget('project-search', 'GET', lambda project: (
+            self.client.get(reverse('project-search'), {'q': "project"})))
+        self.assert_budget('project-stats', 'GET', lambda project: (
+            self.client.get(reverse('project-stats'))))
+        self.assert_budget('project-timeline', 'GET', lambda project: (
+            self.client.get(reverse('project-timeline'),
+                            {'start': "2024-03-01", 'end': "2024-06-30"})))
+        self.assert_budget('project-category-list', 'GET', lambda project: (
+            self.client.get(reverse('project-category-list'))))
+
+    def test_batch(self):
+        self.assert_budget('project-batch', 'POST', lambda project: (
+            self.client.post(reverse('project-batch'), {'operations': [
+                {'op': 'create', 'data': {
+                    'title': "New", 'description': "Batch",
+                    'start_date': "2024-01-01", 'end_date': "2024-02-01",
+                    'category': self.category.id}},
+                {'op': 'update', 'id': project.id,
+                 'data': {'status': 'Done'}},
+            ]}, format='json')))
+
+    def test_project_detail(self):
+        def detail(project):
+            return reverse('project-detail', args=[project.id])
+
+        self.assert_budget('project-detail', 'GET', lambda project: (
+            self.client.get(detail(project))))
+        self.assert_budget('project-detail', 'PUT', lambda project: (
+            self.client.put(detail(project), self.project_data(project),
+                            format='multipart')))
+        self.assert_budget('project-detail', 'PATCH', lambda project: (
+            self.client.patch(detail(project), {'title': "Renamed"},
+                              format='multipart')))
+        self.assert_budget('project-detail', 'DELETE', lambda project: (
+            self.client.delete(detail(project))))
+
+    def test_image_uploads(self):
+        def content(project):
+            return make_upload(f"chunked{project.id}.png").read()
+
+        def start(content):
+            return self.client.post(
+                reverse('image-upload-list'),
+                {'filename': "chunked.png", 'size': len(content)},
+                format='json')
+
+        def detail(project):
+            upload = content(project)
+            url = reverse('image-upload-detail', args=[start(upload).data['id']])
+            return url, upload
+
+        self.assert_budget(
+            'image-upload-list', 'POST', start, prepare=content)
+        self.assert_budget('image-upload-detail', 'GET', lambda upload: (
+            self.client.get(upload[0])), prepare=detail)
+        self.assert_budget('image-upload-detail', 'PATCH', lambda upload: (
+            self.client.patch(
+                upload[0], upload[1],
+                content_type='application/offset+octet-stream',
+                HTTP_UPLOAD_OFFSET='0')), prepare=detail)
+        self.assert_budget('image-upload-detail', 'DELETE', lambda upload: (
+            self.client.delete(upload[0])), prepare=detail)
+
+    def test_ai_description_summary(self):
+        application = Application.objects.create(
+            user=self.user,
+            client_type=Application.CLIENT_CONFIDENTIAL,
+            authorization_grant_type=Application.GRANT_PASSWORD,
+        )
+        AccessToken.objects.create(
+            user=self.user, application=application, token="token",
+            expires=timezone.now() + datetime.timedelta(hours=1),
+            scope="read write")
+
+        async def summarize(project):
+            return await AsyncClient().post(
+                reverse('async_generate_ai_description_summary'),
+                {'project_description': f"Async {project.id}"},
+                content_type='application/json',
+                headers={'Authorization': "Bearer token"})
+
+        with InferenceStub() as stub:
+            with self.settings(HUGGINGFACE_API_URL=stub.url):
+                self.assert_budget(
+                    'generate_ai_description_summary', 'POST',
+                    lambda project: self.client.post(
+                        reverse('generate_ai_description_summary'),
+                        {'project_description': project.description},
+                        format='json'))
+                # Measured with the token not cached yet.
+                self.assert_budget(
+                    'async_generate_ai_description_summary', 'POST',
+                    async_to_sync(summarize),
+                    prepare=lambda project: token_cache.clear() or project)
+        self.assert_budget(
+            'ai_description_summary_stats', 'GET', lambda project: (
+                self.client.get(reverse('ai_description_summary_stats'))))
+
+    def test_exports(self):
+        def done_job(project):
+            pdf_cache.get_project_pdf(project)
+            return PdfExportJob.objects.create(
+                project=project, requested_by=self.user,
+                status=PdfExportJob.JobStatus.DONE)
+
+        self.assert_budget('export_project_pdf', 'GET', lambda project: (
+            self.client.get(reverse('export_project_pdf', args=[project.id]))))
+        self.assert_budget('export_projects_zip', 'GET', lambda project: (
+            self.client.get(reverse('export_projects_zip'))))
+        self.assert_budget('pdf_export_job_status', 'GET', lambda job: (
+            self.client.get(reverse('pdf_export_job_status', args=[job.id]))),
+            prepare=done_job)
+        self.assert_budget('download_pdf_export', 'GET', lambda job: (
+            self.client.get(reverse('download_pdf_export', args=[job.id]))),
+            prepare=done_job)
+        self.assert_budget('send_project_email', 'GET', lambda project: (
+            self.client.get(
+                reverse('send_project_email', args=[project.id]),
+                {'email': "a@example.com,b@example.com"})))
+
+    def test_pages(self):
+        with self.settings(METRICS_PUBLIC=True):
+            self.assert_budget('metrics', 'GET', lambda project: (
+                self.client.get(reverse('metrics'))))
+        with self.settings(TEMPLATES=[{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'DIRS': [self.templates],
+        }]):
+            self.assert_budget('index', 'GET', lambda project: (
+                self.client.get(reverse('index'))))
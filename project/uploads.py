@@ -0,0 +1,220 @@
+import fcntl
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from project.models import Image, ImageUpload
+from project.utils import make_pdf_image
+
+READ_SIZE = 64 * 1024
+
+# Running SHA-256 of the uploads this process received chunks for, keyed
+# by upload id, so a chunk only hashes its own bytes. A chunk landing on
+# another process rebuilds the state from the partial file.
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+MAX_HASHERS = 1024
+
+
+class OffsetMismatch(Exception):
+    """
+    Raised when a chunk does not start where the upload stopped.
+    """
+
+    def __init__(self, upload):
+        super().__init__(upload.received)
+        self.upload = upload
+
+
+def file_sha256(file):
+    """
+    Return the hex SHA-256 of a Django file, leaving it rewound.
+    """
+    hasher = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks(READ_SIZE):
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()
+
+
+def _take_hasher(upload):
+    """
+    Return the SHA-256 state of the first `upload.received` bytes.
+    """
+    with _hashers_lock:
+        received, hasher = _hashers.pop(upload.id, (None, None))
+    if received == upload.received:
+        return hasher
+
+    hasher = hashlib.sha256()
+    remaining = upload.received
+    with open(upload.path, 'rb') as f:
+        while remaining:
+            data = f.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            hasher.update(data)
+            remaining -= len(data)
+    return hasher
+
+
+def _keep_hasher(upload, hasher):
+    with _hashers_lock:
+        _hashers[upload.id] = (upload.received, hasher)
+        while len(_hashers) > MAX_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def _finish(upload, digest):
+    """
+    Turn a fully received upload into an `Image`, reusing the image with
+    the same content when there is one.
+
+    Returns False if the content is not an image.
+    """
+    upload.image = (
+        Image.objects.filter(content_hash=digest).order_by('id').first())
+    if upload.image is None:
+        with open(upload.path, 'rb') as f:
+            content = File(f, name=upload.filename)
+            pdf_image = make_pdf_image(content)
+            if pdf_image is None:
+                return False
+            upload.image = Image.objects.create(
+                image=content, pdf_image=pdf_image, content_hash=digest)
+    os.remove(upload.path)
+    return True
+
+
+def start_upload(owner, filename, size):
+    """
+    Open an upload session for a file of `size` bytes.
+    """
+    upload = ImageUpload.objects.create(
+        owner=owner, filename=os.path.basename(filename), size=size)
+    os.makedirs(settings.IMAGE_UPLOAD_DIR, exist_ok=True)
+    open(upload.path, 'wb').close()
+    return upload
+
+
+def _check_chunk(upload, offset, length):
+    if upload.image_id is not None or offset != upload.received:
+        raise OffsetMismatch(upload)
+    if length > upload.size - upload.received:
+        raise ValidationError(
+            {'detail': "The chunk goes past the end of the upload."})
+
+
+def _record(upload, start):
+    """
+    Store the offset and image of `upload`, whose chunk started at
+    `start`, in one short update of its row.
+
+    Raises `OffsetMismatch` if another chunk was recorded meanwhile, and
+    `ImageUpload.DoesNotExist` if the upload was discarded.
+    """
+    recorded = ImageUpload.objects.filter(
+        id=upload.id, received=start, image__isnull=True,
+    ).update(
+        received=upload.received, image=upload.image,
+        updated_at=timezone.now())
+    if not recorded:
+        raise OffsetMismatch(ImageUpload.objects.get(id=upload.id))
+
+
+def append_chunk(upload_id, owner, offset, stream, length):
+    """
+    Write `length` bytes read from `stream` at `offset` of the upload,
+    hashing them on the way, and create the image once the last byte is
+    received.
+
+    Bytes received before the client went away are kept, so the client can
+    resume from the returned upload's `received` offset. Raises
+    `ImageUpload.DoesNotExist`, `OffsetMismatch` or `ValidationError`.
+    """
+    upload = ImageUpload.objects.get(id=upload_id, owner=owner)
+    _check_chunk(upload, offset, length)
+
+    # The chunk is streamed with no transaction or row lock open, however
+    # slow the client. A lock on the partial file keeps concurrent chunks
+    # of the same upload out instead.
+    invalid = False
+    with open(upload.path, 'r+b') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise OffsetMismatch(upload)
+        # Another chunk may have been recorded before the lock was taken.
+        upload.refresh_from_db()
+        _check_chunk(upload, offset, length)
+
+        start = upload.received
+        hasher = _take_hasher(upload)
+        # Drop bytes of an earlier chunk that was not recorded.
+        f.truncate(start)
+        f.seek(start)
+        try:
+            while length:
+                data = stream.read(min(READ_SIZE, length))
+                if not data:
+                    break
+                f.write(data)
+                hasher.update(data)
+                upload.received += len(data)
+                length -= len(data)
+        except Exception:
+            f.flush()
+            _record(upload, start)
+            _keep_hasher(upload, hasher)
+            raise
+        f.flush()
+
+        if upload.received == upload.size:
+            invalid = not _finish(upload, hasher.hexdigest())
+        if not invalid:
+            _record(upload, start)
+            if upload.image is None:
+                _keep_hasher(upload, hasher)
+
+    if invalid:
+        discard(upload)
+        raise ValidationError({'detail': "The uploaded file is not an image."})
+    return upload
+
+
+def discard(upload):
+    """
+    Delete an upload session and its partial file.
+    """
+    with _hashers_lock:
+        _hashers.pop(upload.id, None)
+    try:
+        os.remove(upload.path)
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def purge_stale(max_age=None):
+    """
+    Discard unfinished uploads not written to for `max_age` seconds
+    (`IMAGE_UPLOAD_EXPIRY` by default) and return how many there were.
+    """
+    if max_age is None:
+        max_age = settings.IMAGE_UPLOAD_EXPIRY
+    stale = ImageUpload.objects.filter(
+        image__isnull=True,
+        updated_at__lt=timezone.now() - timedelta(seconds=max_age))
+    count = 0
+    for upload in stale.iterator():
+        discard(upload)
+        count += 1
+    return count
@@ -8,21 +8,57 @@ urlpatterns = [
     path('projects/',
          views.ProjectList.as_view(),
          name='project-list'),
+    path('projects/search/',
+         views.ProjectSearch.as_view(),
+         name='project-search'),
+    path('projects/batch/',
+         views.ProjectBatch.as_view(),
+         name='project-batch'),
+    path('projects/stats/',
+         views.ProjectStatsView.as_view(),
+         name='project-stats'),
+    path('projects/timeline/',
+         views.ProjectTimeline.as_view(),
+         name='project-timeline'),
     path('projects/<int:pk>/',
          views.ProjectDetail.as_view(),
          name='project-detail'),
     path('project-categories/',
          views.ProjectCategoryList.as_view(),
          name='project-category-list'),
+    path('image-uploads/',
+         views.ImageUploadList.as_view(),
+         name='image-upload-list'),
+    path('image-uploads/<uuid:upload_id>/',
+         views.ImageUploadDetail.as_view(),
+         name='image-upload-detail'),
     path('generate-description-summary/',
          views.GenerateAIDescriptionSummary.as_view(),
          name='generate_ai_description_summary'),
+    path('generate-description-summary/async/',
+         views.AsyncGenerateAIDescriptionSummary.as_view(),
+         name='async_generate_ai_description_summary'),
+    path('generate-description-summary/stats/',
+         views.AIDescriptionSummaryStats.as_view(),
+         name='ai_description_summary_stats'),
     path('export-pdf/<int:project_id>/',
          views.export_project_pdf,
          name='export_project_pdf'),
+    path('export-zip/',
+         views.export_projects_zip,
+         name='export_projects_zip'),
+    path('export-jobs/<int:job_id>/',
+         views.pdf_export_job_status,
+         name='pdf_export_job_status'),
+    path('export-jobs/<int:job_id>/download/',
+         views.download_pdf_export,
+         name='download_pdf_export'),
     path('send-email/<int:project_id>/',
          views.send_project_email,
          name='send_project_email'),
+    path('metrics',
+         views.prometheus_metrics,
+         name='metrics'),
     path('', views.index, name='index'),
 ]
 
@@ -1,28 +1,67 @@
-import os
-import requests
+import datetime
+import re
+from io import BytesIO
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.core.mail import EmailMessage
-from django.http import HttpResponse, Http404, JsonResponse
+from django.contrib.postgres.fields.ranges import DateRange
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.core.validators import validate_email
+from django.db.models import Count, F, Max
+from django.http import (
+    FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.cache import get_conditional_response
+from django.views import View
+from django.views.decorators.http import require_GET
 from rest_framework import generics, status
 from rest_framework import permissions
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from project.models import Project, ProjectCategory
-from project.serializers import ProjectSerializer, ProjectCategorySerializer
+from project import category_cache, metrics
+from project.ai_summary import (
+    SummaryError, arequest_summary, build_summary_prompt, request_summary,
+    summary_cache)
+from project.archive import aiter_projects_zip, iter_projects_zip
+from project.batch import apply_batch
+from project.conditional import check_conditions, make_etag, set_validators
+from project.filters import ProjectFilter, ProjectOrderingFilter
+from project.jobs import enqueue_pdf_export
+from project.models import (
+    ImageUpload, PdfExportJob, Project, ProjectCategory, ProjectStats,
+    priority_rank, project_span)
+from project.outbox import enqueue_project_email
+from project.pdf_cache import get_project_pdf
+from project.pagination import (
+    ProjectCursorPagination, ProjectSearchPagination)
+from project.serializers import (
+    ImageUploadSerializer, PdfExportJobSerializer, ProjectSerializer,
+    ProjectCategorySerializer)
+from project.uploads import (
+    OffsetMismatch, append_chunk, discard, start_upload)
 from project.permissions import IsOwner #, IsOwnerOrReadOnly
-from project.utils import generate_pdf
 
 
 class ProjectList(generics.ListCreateAPIView):
     """
     List all projects, or create a new project.
     """
-    queryset = Project.objects.all()
+    queryset = Project.objects.prefetch_related('images')
     serializer_class = ProjectSerializer
+    pagination_class = ProjectCursorPagination
+    filter_backends = [ProjectFilter, ProjectOrderingFilter]
+    ordering_fields = ['id', 'start_date', 'end_date', 'priority', 'status']
+    ordering = ['-id']
 
     permission_classes = [
         permissions.IsAuthenticated]
@@ -31,7 +70,28 @@ class ProjectList(generics.ListCreateAPIView):
         """
         Return the list of projects where the logged-in user is the owner.
         """
-        return self.queryset.filter(created_by=self.request.user)
+        return (self.queryset
+                .filter(created_by=self.request.user)
+                .annotate(priority_rank=priority_rank()))
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the projects, or answer `304 Not Modified` when none of the
+        listed projects changed since the client's copy.
+        """
+        state = (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .aggregate(count=Count('id'), last_update=Max('updated_at'))
+        )
+        # Deletions only show in the count, so no Last-Modified here.
+        etag = make_etag(request.user.id, request.get_full_path(),
+                         state['count'], state['last_update'])
+
+        response = check_conditions(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag=etag)
 
     def perform_create(self, serializer):
         """
@@ -39,14 +99,171 @@ class ProjectList(generics.ListCreateAPIView):
         """
         user = self.request.user
         serializer.save(created_by=user)
-        return super().perform_create(serializer)
+
+
+class ProjectSearch(generics.ListAPIView):
+    """
+    Full-text search over the logged-in user's project titles and
+    descriptions, best matches first.
+    """
+    serializer_class = ProjectSerializer
+    pagination_class = ProjectSearchPagination
+
+    permission_classes = [
+        permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Match every word of `q`, each as a prefix, against the indexed
+        search vector and rank titles above descriptions.
+        """
+        terms = re.findall(r'\w+', self.request.query_params.get('q', ''))
+        if not terms:
+            raise ValidationError({'q': 'A search query is required.'})
+
+        query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            search_type='raw', config='english')
+        return (
+            Project.objects
+            .filter(created_by=self.request.user, search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', '-id')
+            .prefetch_related('images')
+        )
+
+
+class ProjectBatch(APIView):
+    """
+    Create, update and delete many projects in one request.
+
+    Expects `{"operations": [{"op": "create", "data": {...}},
+    {"op": "update", "id": 1, "data": {...}}, {"op": "delete", "id": 2}]}`
+    and applies all of them in one transaction, or none if any is invalid.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """
+        handle post http method
+        """
+        if not isinstance(request.data, dict):
+            raise ValidationError({'detail': (
+                'Expected an object with a list of "operations".')})
+        results, ok = apply_batch(
+            request.data.get('operations'), request.user)
+        return Response(
+            {'results': results},
+            status=status.HTTP_200_OK if ok else status.HTTP_400_BAD_REQUEST)
+
+
+class ProjectStatsView(APIView):
+    """
+    Dashboard counts of the logged-in user's projects.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """
+        handle get http method
+        """
+        stats = (
+            ProjectStats.objects.filter(user=request.user).first()
+            or ProjectStats(user=request.user)
+        )
+        return Response({
+            'total': stats.total,
+            'by_status': {
+                **dict.fromkeys(Project.ProjectStatus.values, 0),
+                **stats.by_status,
+            },
+            'by_priority': {
+                **dict.fromkeys(Project.ProjectPriority.values, 0),
+                **stats.by_priority,
+            },
+            'by_category': stats.by_category,
+            'overdue': stats.overdue(timezone.localdate()),
+        })
+
+
+class ProjectTimeline(APIView):
+    """
+    Projects of the logged-in user overlapping a date window, for the
+    Gantt chart.
+
+    `start` and `end` are inclusive ISO dates; the filters of the project
+    list apply too. The payload is column oriented: item `i` of each list
+    describes the same project, offsets are days from `start` (negative
+    when the project begins earlier) and statuses index `status_choices`.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_window(self):
+        params = self.request.query_params
+        window, errors = {}, {}
+        for param in ('start', 'end'):
+            try:
+                window[param] = datetime.date.fromisoformat(
+                    params.get(param, ''))
+            except ValueError:
+                errors[param] = "Expected a date in YYYY-MM-DD format."
+        if errors:
+            raise ValidationError(errors)
+
+        days = (window['end'] - window['start']).days
+        if days < 0:
+            raise ValidationError({'end': "Must not be before start."})
+        if days >= settings.PROJECT_TIMELINE_MAX_DAYS:
+            raise ValidationError({'end': (
+                f"The window spans at most "
+                f"{settings.PROJECT_TIMELINE_MAX_DAYS} days.")})
+        return window['start'], window['end']
+
+    def get(self, request, *args, **kwargs):
+        """
+        handle get http method
+        """
+        start, end = self.get_window()
+        # Matches the GiST index on the projects' date range.
+        queryset = (
+            Project.objects
+            .filter(created_by=request.user)
+            .annotate(span=project_span())
+            .filter(span__overlap=DateRange(start, end, '[]'))
+        )
+        rows = (
+            ProjectFilter().filter_queryset(request, queryset, self)
+            .order_by('start_date', 'id')
+            .values_list('id', 'title', 'start_date', 'end_date', 'status')
+        )
+
+        status_choices = Project.ProjectStatus.values
+        status_index = {value: i for i, value in enumerate(status_choices)}
+        ids, titles, start_offsets, end_offsets, statuses = [], [], [], [], []
+        for pk, title, start_date, end_date, project_status in rows:
+            ids.append(pk)
+            titles.append(title)
+            start_offsets.append((start_date - start).days)
+            end_offsets.append((end_date - start).days)
+            statuses.append(status_index[project_status])
+
+        return Response({
+            'start': start,
+            'end': end,
+            'status_choices': status_choices,
+            'ids': ids,
+            'titles': titles,
+            'start_offsets': start_offsets,
+            'end_offsets': end_offsets,
+            'statuses': statuses,
+        })
 
 
 class ProjectDetail(generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a project instance.
     """
-    queryset = Project.objects.all()
+    queryset = Project.objects.prefetch_related('images')
     serializer_class = ProjectSerializer
     parser_classes = [MultiPartParser, FormParser]
 
@@ -55,14 +272,131 @@ class ProjectDetail(generics.RetrieveUpdateDestroyAPIView):
         # IsOwnerOrReadOnly,
         IsOwner]
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Return the project, or answer `304 Not Modified` after checking
+        only its owner and modification time.
+        """
+        state = get_object_or_404(
+            Project.objects.only('id', 'created_by', 'updated_at'),
+            pk=kwargs['pk'])
+        self.check_object_permissions(request, state)
+
+        etag = make_etag(state.id, state.updated_at.isoformat())
+        response = check_conditions(
+            request, etag=etag, last_modified=state.updated_at)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        return set_validators(
+            response, etag=etag, last_modified=state.updated_at)
+
 
 class ProjectCategoryList(generics.ListAPIView):
     """
     List all project categories.
+
+    The list is served from a process-local cache with an ETag, so
+    unchanged categories cost neither a query nor a body.
     """
     queryset = ProjectCategory.objects.all()
     serializer_class = ProjectCategorySerializer
 
+    def list(self, request, *args, **kwargs):
+        categories, etag = category_cache.get_categories()
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(categories)
+        response['ETag'] = etag
+        return response
+
+
+def upload_response(request, upload, status_code=status.HTTP_200_OK):
+    response = Response(
+        ImageUploadSerializer(upload, context={'request': request}).data,
+        status=status_code)
+    response['Upload-Offset'] = upload.received
+    return response
+
+
+class ImageUploadList(APIView):
+    """
+    Start a resumable image upload.
+
+    Expects `{"filename": ..., "size": ...}` and returns the upload, whose
+    URL then receives the file's bytes in chunks.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """
+        handle post http method
+        """
+        serializer = ImageUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = start_upload(
+            request.user,
+            serializer.validated_data['filename'],
+            serializer.validated_data['size'])
+        response = upload_response(request, upload, status.HTTP_201_CREATED)
+        response['Location'] = reverse(
+            'image-upload-detail', args=[upload.id])
+        return response
+
+
+class ImageUploadDetail(APIView):
+    """
+    Show, continue or cancel a resumable image upload.
+
+    A PATCH sends the next chunk as the raw request body, with the offset
+    it starts at in the `Upload-Offset` header. A chunk that does not start
+    at the upload's current offset is refused with 409 and that offset, so
+    a client that lost its connection can resume from there. Once the last
+    byte arrives, `image` holds the stored image, to be attached through a
+    project's `existing_images`; a file already stored reuses that image.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        return get_object_or_404(
+            ImageUpload, id=self.kwargs['upload_id'], owner=self.request.user)
+
+    def get(self, request, *args, **kwargs):
+        """
+        handle get http method
+        """
+        return upload_response(request, self.get_object())
+
+    def patch(self, request, *args, **kwargs):
+        """
+        handle patch http method
+        """
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            raise ValidationError({'detail': (
+                "Upload-Offset and Content-Length headers are required.")})
+        if offset < 0 or length <= 0:
+            raise ValidationError({'detail': "Expected a non-empty chunk."})
+
+        try:
+            upload = append_chunk(
+                kwargs['upload_id'], request.user, offset, request.stream,
+                length)
+        except ImageUpload.DoesNotExist:
+            raise Http404
+        except OffsetMismatch as e:
+            return upload_response(request, e.upload, status.HTTP_409_CONFLICT)
+        return upload_response(request, upload)
+
+    def delete(self, request, *args, **kwargs):
+        """
+        handle delete http method
+        """
+        discard(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class GenerateAIDescriptionSummary(APIView):
     """
@@ -86,50 +420,19 @@ class GenerateAIDescriptionSummary(APIView):
                 },
                 status=status.HTTP_400_BAD_REQUEST)
 
-        # Construct the prompt based on the provided data
-        prompt = "Generate a summary for the following project description"
+        prompt = build_summary_prompt(
+            project_description, project_title, project_category)
 
-        if project_title:
-            prompt += f" for the project titled '{project_title}'"
-            if project_category:
-                prompt += f" in the category of '{project_category}'"
-        elif project_category:
-            prompt += f" in the category of '{project_category}'"
-        
-        prompt += f". Here is the description: {project_description}"
-
-        # Prepare the headers for Hugging Face API
-        headers = {
-            "Authorization": f"Bearer {os.environ.get('HUGGINGFACE_ACCESS_TOKEN')}"
-        }
-
-        # Send request to Hugging Face model
+        # Send request to Hugging Face model, unless the same prompt was
+        # summarized recently or is being summarized right now
         try:
-            response = requests.post(
-                f"{settings.HUGGINGFACE_API_URL}/models/EleutherAI/gpt-neo-2.7B",
-                headers=headers,
-                json={"inputs": prompt},
-                timeout=10
-            )
-            response.raise_for_status()
-
-            # Parse the response
-            response_data = response.json()
-            if isinstance(response_data, list):
-                ai_description = response_data[0].get(
-                    'generated_text',
-                    'AI-generated description unavailable.')
-            elif isinstance(response_data, dict):
-                ai_description = response_data.get(
-                    'generated_text',
-                    'AI-generated description unavailable.')
-            else:
-                ai_description = 'AI-generated description unavailable.'
+            ai_description = summary_cache.get_or_compute(
+                prompt, lambda: request_summary(prompt))
 
             # Return the AI-generated description summary
             return Response({"description": ai_description})
 
-        except requests.exceptions.RequestException as e:
+        except SummaryError as e:
             # Handle request errors (e.g., network issues, invalid API)
             return Response(
                 {"error": f"Error contacting the AI service: {str(e)}"},
@@ -137,49 +440,252 @@ class GenerateAIDescriptionSummary(APIView):
             )
 
 
+class AsyncGenerateAIDescriptionSummary(View):
+    """
+    Generate a detailed description for a project without holding a
+    worker while the AI service answers.
+
+    Serve it through `project_planning_tool.asgi` so many summary calls can
+    be outstanding in one process; they share a pooled HTTP client.
+    """
+    parser_classes = [JSONParser, FormParser, MultiPartParser]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Authentication is by bearer token, as with APIView.
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    def authenticate(self, request):
+        """
+        Run the API authentication classes and parse the request body.
+        """
+        drf_request = Request(
+            request,
+            parsers=[parser() for parser in self.parser_classes],
+            authenticators=[
+                authenticator()
+                for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+            ],
+        )
+        try:
+            return drf_request.user, drf_request.data
+        except APIException as e:
+            return None, e
+
+    async def post(self, request, *args, **kwargs):
+        """
+        handle post http method
+        """
+        user, data = await sync_to_async(self.authenticate)(request)
+        if isinstance(data, APIException):
+            return JsonResponse({"detail": data.detail},
+                                status=data.status_code)
+        if not user or not user.is_authenticated:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED)
+
+        project_description = data.get('project_description')
+
+        # Validate that project_description exists and is not empty
+        if not project_description or project_description.strip() == "":
+            return JsonResponse(
+                {
+                    "error": "Project description is required and cannot be empty."
+                },
+                status=status.HTTP_400_BAD_REQUEST)
+
+        prompt = build_summary_prompt(
+            project_description,
+            data.get('project_title'),
+            data.get('project_category'))
+
+        try:
+            ai_description = await summary_cache.aget_or_compute(
+                prompt, lambda: arequest_summary(prompt))
+        except SummaryError as e:
+            return JsonResponse(
+                {"error": f"Error contacting the AI service: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return JsonResponse({"description": ai_description})
+
+
+class AIDescriptionSummaryStats(APIView):
+    """
+    Report hit/miss counters of the AI description summary cache.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        """
+        handle get http method
+        """
+        return Response(summary_cache.stats())
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def export_project_pdf(request, project_id):
     """
-    Export project details as a formatted PDF, including all fields
-    (title, description, dates, etc.) and associated images.
+    Queue an export of the project details as a formatted PDF, including
+    all fields (title, description, dates, etc.) and associated images.
+
+    The PDF is rendered by the `run_pdf_worker` command; poll the returned
+    status URL and download the file once the job is done.
+    """
+    project = get_object_or_404(
+        Project, id=project_id, created_by=request.user)
+    job = enqueue_pdf_export(project, request.user)
+    data = PdfExportJobSerializer(job).data
+    data['status_url'] = reverse('pdf_export_job_status', args=[job.id])
+    return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_projects_zip(request):
+    """
+    Stream a ZIP archive with the PDF of every matching project owned by
+    the user. Projects are selected by `ids` (comma separated) and/or the
+    filters accepted by the project list.
     """
-    project = get_object_or_404(Project, id=project_id)
-    buffer = generate_pdf(project)
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename=project_{project.id}.pdf'  # Set filename for download
+    projects = ProjectFilter().filter_queryset(
+        request, Project.objects.filter(created_by=request.user), None)
+
+    ids = request.GET.get('ids')
+    if ids:
+        try:
+            projects = projects.filter(
+                id__in=[int(project_id) for project_id in ids.split(',')])
+        except ValueError:
+            return JsonResponse(
+                {'error': 'ids must be a comma separated list of integers.'},
+                status=400)
+
+    projects = (
+        projects
+        .order_by('id')
+        .prefetch_related('images')
+        .iterator(chunk_size=100)
+    )
+    # Under ASGI only an async iterator is streamed rather than buffered.
+    if isinstance(request._request, ASGIRequest):
+        chunks = aiter_projects_zip(projects)
+    else:
+        chunks = iter_projects_zip(projects)
+    response = StreamingHttpResponse(chunks, content_type='application/zip')
+    response['Content-Disposition'] = 'attachment; filename=projects.zip'
     return response
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def pdf_export_job_status(request, job_id):
+    """
+    Report the progress of a PDF export job.
+    """
+    job = get_object_or_404(
+        PdfExportJob, id=job_id, requested_by=request.user)
+    data = PdfExportJobSerializer(job).data
+    if job.status == PdfExportJob.JobStatus.DONE:
+        data['download_url'] = reverse(
+            'download_pdf_export', args=[job.id])
+    return Response(data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_pdf_export(request, job_id):
+    """
+    Download the PDF rendered by a finished export job.
+
+    The render is read from the PDF cache, and made again if the project
+    changed or the render was evicted since.
+    """
+    job = get_object_or_404(
+        PdfExportJob.objects
+        .select_related('project')
+        .prefetch_related('project__images'),
+        id=job_id, requested_by=request.user)
+    if job.status != PdfExportJob.JobStatus.DONE:
+        return JsonResponse(
+            {'error': f'Export is not ready (status: {job.status}).'},
+            status=409)
+
+    return FileResponse(
+        BytesIO(get_project_pdf(job.project)),
+        as_attachment=True,
+        filename=f'project_{job.project_id}.pdf',
+        content_type='application/pdf')
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def send_project_email(request, project_id):
     """
-    Send project details via email to a specified recipient.
+    Queue project details to be emailed to one or more recipients, given
+    as repeated and/or comma separated `email` parameters.
+
+    Delivery is done by the `dispatch_emails` command.
     """
     # Validate Project ID
-    project = get_object_or_404(Project, id=project_id)
-
-    # Validate Email Address
-    recipient = request.GET.get('email')
-    if not recipient:
+    project = get_object_or_404(
+        Project, id=project_id, created_by=request.user)
+
+    # Validate Email Addresses
+    recipients = [
+        address.strip()
+        for value in request.GET.getlist('email')
+        for address in value.split(',')
+        if address.strip()
+    ]
+    if not recipients:
         return JsonResponse({'error': 'Email address is required.'}, status=400)
+    if len(recipients) > settings.PROJECT_EMAIL_MAX_RECIPIENTS:
+        return JsonResponse(
+            {'error': (f'At most {settings.PROJECT_EMAIL_MAX_RECIPIENTS} '
+                       'recipients per email.')},
+            status=400)
+
+    for recipient in recipients:
+        try:
+            validate_email(recipient)
+        except DjangoValidationError:
+            return JsonResponse(
+                {'error': f'Invalid email address: {recipient}'}, status=400)
 
     include_pdf = request.GET.get('include_pdf', 'false').lower() == 'true'
 
-    subject = f"Project Details: {project.title}"
-    message = f"Description:\n\n{project.description}"
+    email = enqueue_project_email(
+        project, request.user, recipients, include_pdf)
 
-    email = EmailMessage(subject, message, to=[recipient])
+    return JsonResponse(
+        {'message': 'Email queued for delivery.', 'id': email.id},
+        status=202)
 
-    # Include PDF if requested
-    if include_pdf:
-        buffer = generate_pdf(project)
-        email.attach(f"{project.title}.pdf", buffer.read(), 'application/pdf')
 
-    email.send()
+@require_GET
+def prometheus_metrics(request):
+    """
+    Request, SQL, PDF, Hugging Face and SMTP metrics of this process, in
+    the Prometheus text format.
 
-    return JsonResponse({'message': 'Email sent successfully!'}, status=200)
+    Closed unless `METRICS_TOKEN` is set, and then requested with it, or
+    `METRICS_PUBLIC` opens it to anyone.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        if not constant_time_compare(
+                request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse(status=401)
+    elif not settings.METRICS_PUBLIC:
+        return HttpResponse(status=403)
+    return HttpResponse(
+        metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 def index(request):
@@ -2,6 +2,9 @@
 ASGI config for project_planning_tool project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server, e.g.
+``uvicorn project_planning_tool.asgi:application``, so async views such as
+the AI description summary run on the event loop.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -14,3 +17,12 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_planning_tool.settings')
 
 application = get_asgi_application()
+
+# Load the views and the PDF engine now rather than on the first request,
+# when WARM_UP_WORKERS is set.
+from django.conf import settings  # noqa: E402
+
+if settings.WARM_UP_WORKERS:
+    from project.startup import warm_up
+
+    warm_up()
@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'project',
     'user',
     'corsheaders',
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'project.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,12 +92,20 @@ DATABASES = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        #  OAuth2
-        'oauth2_provider.contrib.rest_framework.OAuth2Authentication',
-        'drf_social_oauth2.authentication.SocialAuthentication',
+        #  OAuth2, with validated tokens cached in process
+        'user.authentication.CachedOAuth2Authentication',
+        'user.authentication.CachedSocialAuthentication',
     ]
 }
 
+# Seconds and number of entries validated access tokens are cached for.
+# Revocations reach other processes through the shared CACHES below, which
+# each process checks for a cached token at most every
+# OAUTH2_TOKEN_REVOCATION_CHECK seconds.
+OAUTH2_TOKEN_CACHE_TTL = 60
+OAUTH2_TOKEN_CACHE_SIZE = 10000
+OAUTH2_TOKEN_REVOCATION_CHECK = 5
+
 AUTHENTICATION_BACKENDS = (
     # Google  OAuth2
     'social_core.backends.google.GoogleOAuth2',
@@ -164,6 +174,71 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'  # URL to access media files in the browser
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# The default cache carries the category version stamp and the access token
+# revocation markers, which every worker process must see, so it is shared:
+# Redis when REDIS_URL is set, a database table otherwise, which `migrate`
+# creates. Set REDIS_URL in production: cache reads then skip the database.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
+# Seconds a process uses its cached categories before checking the shared
+# version stamp again.
+PROJECT_CATEGORY_CACHE_TTL = 5
+
+# Largest number of operations accepted by the project batch endpoint
+PROJECT_BATCH_MAX_OPERATIONS = 5000
+
+# Largest number of recipients of one project email
+PROJECT_EMAIL_MAX_RECIPIENTS = 10
+
+# Widest date window, in days, accepted by the project timeline endpoint
+PROJECT_TIMELINE_MAX_DAYS = 3660
+
+# Rendered project PDFs, reused until the project or its images change
+PDF_CACHE_DIR = os.path.join(BASE_DIR, 'pdf_cache')
+PDF_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Processes each web worker starts, on its first ZIP export, to render
+# PDFs in parallel; 0 renders them in the request thread
+PDF_RENDER_PROCESSES = int(os.environ.get('PDF_RENDER_PROCESSES', 0))
+# Seconds a claimed PDF export may stay running before another worker
+# takes it over, and the claims after which it is failed instead
+PDF_EXPORT_LEASE = 10 * 60
+PDF_EXPORT_MAX_ATTEMPTS = 3
+# Seconds a finished PDF export job is kept, see `purge_pdf_exports`
+PDF_EXPORT_RETENTION = 7 * 24 * 60 * 60
+
+# Partial files of chunked image uploads, their largest accepted size and
+# the seconds an unfinished upload is kept without receiving a chunk
+IMAGE_UPLOAD_DIR = os.path.join(BASE_DIR, 'image_uploads')
+IMAGE_UPLOAD_MAX_BYTES = 50 * 1024 * 1024
+IMAGE_UPLOAD_EXPIRY = 24 * 60 * 60
+
+# Prometheus metrics served on /metrics to requests bearing METRICS_TOKEN.
+# Without a token the endpoint is closed, unless METRICS_PUBLIC=1 opens it
+# to anyone. Metrics are per process: scrape every worker.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC') == '1'
+# Add a Server-Timing header (app, db, pdf, hf, smtp) to every response
+METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING') == '1'
+
+# Load the URLconf and the PDF engine when the WSGI or ASGI application is
+# loaded instead of on the first requests. Pays off with a server that
+# preloads the application before forking (gunicorn --preload); otherwise
+# every worker loads the PDF engine, whether it renders PDFs or not.
+WARM_UP_WORKERS = os.environ.get('WARM_UP_WORKERS') == '1'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -173,14 +248,34 @@ APPEND_SLASH = False
 # LOGIN_REDIRECT_URL = '/'
 # LOGOUT_REDIRECT_URL = '/'
 
-HUGGINGFACE_API_URL = "https://api-inference.huggingface.co"
+HUGGINGFACE_API_URL = os.environ.get(
+    'HUGGINGFACE_API_URL', "https://api-inference.huggingface.co")
+
+# Connection pool of the async summary endpoint: requests beyond
+# HUGGINGFACE_MAX_CONNECTIONS wait for a free connection.
+HUGGINGFACE_MAX_CONNECTIONS = int(
+    os.environ.get('HUGGINGFACE_MAX_CONNECTIONS', 100))
+HUGGINGFACE_MAX_KEEPALIVE_CONNECTIONS = 20
+
+# Generated summaries are reused for identical prompts for this many
+# seconds, keeping at most AI_SUMMARY_CACHE_SIZE of them per process.
+AI_SUMMARY_CACHE_TTL = 300
+AI_SUMMARY_CACHE_SIZE = 1024
 
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+# Point these at a local SMTP stand-in (e.g. `python -m aiosmtpd -n`) to
+# try the outbox without sending real mail.
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'true').lower() == 'true'
 EMAIL_USE_SSL = False
 DEFAULT_FROM_EMAIL = 'Project Planning Tool'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
+
+# Email outbox: messages are retried with exponential backoff starting at
+# EMAIL_OUTBOX_RETRY_DELAY seconds, and given up after
+# EMAIL_OUTBOX_MAX_ATTEMPTS attempts.
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_planning_tool.settings')
 
 application = get_wsgi_application()
+
+# Load the views and the PDF engine now rather than on the first request,
+# when WARM_UP_WORKERS is set.
+from django.conf import settings  # noqa: E402
+
+if settings.WARM_UP_WORKERS:
+    from project.startup import warm_up
+
+    warm_up()
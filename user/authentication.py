@@ -0,0 +1,174 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from drf_social_oauth2.authentication import SocialAuthentication
+from oauth2_provider.contrib.rest_framework import OAuth2Authentication
+from rest_framework.authentication import get_authorization_header
+
+
+def _marker(kind, key):
+    return f'auth-token:{kind}:{key}'
+
+
+def _copy(value):
+    """
+    Copy a `(user, auth)` pair, so requests in other threads never share,
+    or see the changes to, the same model instances.
+    """
+    user, auth = value
+    user = copy.copy(user)
+    if getattr(auth, 'user_id', None) == user.pk:
+        auth = copy.copy(auth)
+        auth.user = user
+    return user, auth
+
+
+class TokenCache:
+    """
+    Thread-safe TTL + LRU cache of authenticated `(user, auth)` pairs by
+    token.
+
+    Revoking a token or changing a user drops its entries in this process
+    at once, and writes a timestamp to the default cache, which `CACHES`
+    shares between processes. Other processes read those timestamps for an
+    entry at most once every `check_interval` seconds, so most hits touch
+    neither the database nor the cache backend. Each hit returns its own
+    copy of the pair.
+    """
+
+    def __init__(self, max_entries, ttl, check_interval):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256(' '.join(parts).encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            cached_at, expires_at, user_id, value, checked_at = entry
+            now = time.time()
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            if now - checked_at < self.check_interval:
+                return _copy(value)
+
+        markers = cache.get_many(
+            [_marker('token', key), _marker('user', user_id)])
+        with self._lock:
+            if any(revoked_at >= cached_at
+                   for revoked_at in markers.values()):
+                self._entries.pop(key, None)
+                return None
+            if key in self._entries:
+                self._entries[key] = entry[:-1] + (now,)
+        return _copy(value)
+
+    def set(self, key, value, since, expires_at=None):
+        """
+        Cache `value`, a `(user, auth)` pair loaded after the timestamp
+        `since`, until `expires_at` or for the TTL, whichever comes first.
+        Revocations after `since` still apply to it.
+        """
+        expires_at = min(since + self.ttl, expires_at or since + self.ttl)
+        with self._lock:
+            self._entries[key] = (
+                since, expires_at, value[0].pk, _copy(value), since)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def revoke(self, key):
+        """
+        Drop the entry of a token in every process.
+        """
+        cache.set(_marker('token', key), time.time(), self.ttl)
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def forget_user(self, user_id):
+        """
+        Drop the entries of a user in every process.
+        """
+        cache.set(_marker('user', user_id), time.time(), self.ttl)
+        with self._lock:
+            for key in [key for key, entry in self._entries.items()
+                        if entry[2] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(
+    settings.OAUTH2_TOKEN_CACHE_SIZE, settings.OAUTH2_TOKEN_CACHE_TTL,
+    settings.OAUTH2_TOKEN_REVOCATION_CHECK)
+
+
+def _bearer(request):
+    auth = get_authorization_header(request).split()
+    if len(auth) < 2 or auth[0].lower() != b'bearer':
+        return None
+    try:
+        return [part.decode() for part in auth[1:]]
+    except UnicodeDecodeError:
+        return None
+
+
+class CachedOAuth2Authentication(OAuth2Authentication):
+    """
+    `OAuth2Authentication` remembering validated bearer tokens and their
+    users in `token_cache`, so repeat requests run no auth queries.
+    """
+
+    def authenticate(self, request):
+        credentials = _bearer(request)
+        if credentials is None or len(credentials) != 1:
+            return super().authenticate(request)
+
+        key = TokenCache.key(credentials[0])
+        result = token_cache.get(key)
+        if result is None:
+            since = time.time()
+            result = super().authenticate(request)
+            if result is not None:
+                token_cache.set(
+                    key, result, since, result[1].expires.timestamp())
+        return result
+
+
+class CachedSocialAuthentication(SocialAuthentication):
+    """
+    `SocialAuthentication` remembering the users of `<backend> <token>`
+    credentials in `token_cache`, which saves a call to the provider as
+    well as the queries. Revocation at the provider is only seen once the
+    entry expires.
+    """
+
+    def authenticate(self, request, **kwargs):
+        credentials = _bearer(request)
+        if credentials is None or len(credentials) != 2:
+            return super().authenticate(request)
+
+        key = TokenCache.key(*credentials)
+        result = token_cache.get(key)
+        if result is None:
+            since = time.time()
+            result = super().authenticate(request)
+            if result is not None:
+                token_cache.set(key, result, since)
+        return result
@@ -0,0 +1,135 @@
+import csv
+import json
+
+from django.contrib.auth.hashers import make_password
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from .models import User
+from .serializers import SignUpSerializer
+
+
+class ImportUserSerializer(SignUpSerializer):
+    """
+    The sign-up fields, validated without queries: `import_users` checks
+    uniqueness once per batch instead.
+    """
+
+    def validate(self, attrs):
+        return attrs
+
+
+def read_rows(f, format):
+    """
+    Yield `(line number, row)` for each user of a CSV file with a header
+    line, or of an NDJSON file. `row` is None if the line is not JSON.
+    """
+    if format == 'csv':
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _import_batch(batch, seen, executor, chunksize, dry_run):
+    serializer = ImportUserSerializer()
+    valid, errors = [], []
+    for line, row in batch:
+        if row is None:
+            errors.append((line, {'detail': "Expected a JSON object."}))
+            continue
+        try:
+            data = serializer.run_validation(row)
+        except ValidationError as e:
+            errors.append((line, e.detail))
+            continue
+
+        duplicate = {
+            field: "Appears earlier in the file."
+            for field in ('email', 'username')
+            if data[field] in seen[field]
+        }
+        if duplicate:
+            errors.append((line, duplicate))
+            continue
+        seen['email'].add(data['email'])
+        seen['username'].add(data['username'])
+        valid.append((line, data))
+
+    if not valid:
+        return 0, errors
+
+    # One query finds every row of the batch whose email or username is
+    # already taken.
+    taken = {'email': set(), 'username': set()}
+    for email, username in User.objects.filter(
+            Q(email__in=[data['email'] for _, data in valid]) |
+            Q(username__in=[data['username'] for _, data in valid])
+    ).values_list('email', 'username'):
+        taken['email'].add(email)
+        taken['username'].add(username)
+
+    users = []
+    for line, data in valid:
+        conflicts = {
+            field: f"{field.capitalize()} has already been used."
+            for field in ('email', 'username')
+            if data[field] in taken[field]
+        }
+        if conflicts:
+            errors.append((line, conflicts))
+        else:
+            users.append(data)
+
+    if dry_run or not users:
+        return len(users), errors
+
+    passwords = [data.pop('password') for data in users]
+    if executor is None:
+        hashes = map(make_password, passwords)
+    else:
+        hashes = executor.map(make_password, passwords, chunksize=chunksize)
+    User.objects.bulk_create(
+        User(password=password_hash, **data)
+        for data, password_hash in zip(users, hashes))
+    return len(users), errors
+
+
+def import_users(rows, batch_size=1000, executor=None, chunksize=1,
+                 dry_run=False):
+    """
+    Create the users of `(line number, row)` pairs in batches of
+    `batch_size`, with the fields and checks of sign-up.
+
+    Passwords are hashed on `executor` when given, a process pool with
+    Django set up, `chunksize` at a time. Returns the number of users
+    created, and `(line number, errors)` for every rejected row.
+    """
+    seen = {'email': set(), 'username': set()}
+    created, errors = 0, []
+    for batch in _batches(rows, batch_size):
+        batch_created, batch_errors = _import_batch(
+            batch, seen, executor, chunksize, dry_run)
+        created += batch_created
+        errors += batch_errors
+    return created, errors
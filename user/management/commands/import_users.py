@@ -0,0 +1,61 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from user.importer import import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = ("Create users from a CSV (with a header line) or NDJSON file of "
+            "email, username and password, hashing passwords in a pool of "
+            "processes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=['csv', 'ndjson'],
+            help="File format (default: from the file extension).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count(),
+            help="Number of hashing processes (0 hashes in this process).")
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only report the rows that would be rejected.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'ndjson')
+        processes = options['processes']
+
+        try:
+            f = open(path, newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        with f:
+            rows = read_rows(f, format)
+            if processes == 0 or options['dry_run']:
+                created, errors = import_users(
+                    rows, options['batch_size'], dry_run=options['dry_run'])
+            else:
+                # Spawned workers start from a clean interpreter, so they
+                # never share the parent's database connections.
+                with ProcessPoolExecutor(
+                        max_workers=processes,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=django.setup) as executor:
+                    created, errors = import_users(
+                        rows, options['batch_size'], executor,
+                        chunksize=max(
+                            1, options['batch_size'] // (processes * 4)))
+
+        for line, row_errors in errors:
+            self.stderr.write(f"Line {line}: {row_errors}")
+        verb = "Would create" if options['dry_run'] else "Created"
+        self.stdout.write(
+            f"{verb} {created} user(s), rejected {len(errors)} row(s).")
@@ -1,3 +1,4 @@
+from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.validators import ValidationError
 
@@ -14,16 +15,19 @@ class SignUpSerializer(serializers.ModelSerializer):
         fields = ["email", "username", "password"]
 
     def validate(self, attrs):
-        email_exists = User.objects.filter(email=attrs["email"]).exists()
-        username_exists = User.objects.filter(username=attrs["username"]).exists()
+        # One query finds both conflicts: each field is unique, so at most
+        # two users match.
+        taken = User.objects.filter(
+            Q(email=attrs["email"]) | Q(username=attrs["username"])
+        ).values_list("email", "username")[:2]
 
         errors = {}
 
-        if email_exists:
-            errors["email"] = "Email has already been used."
-
-        if username_exists:
-            errors["username"] = "Username has already been used."
+        for email, username in taken:
+            if email == attrs["email"]:
+                errors["email"] = "Email has already been used."
+            if username == attrs["username"]:
+                errors["username"] = "Username has already been used."
 
         if errors:
             raise ValidationError(errors)
@@ -33,7 +37,8 @@ class SignUpSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         password = validated_data.pop("password")
 
-        user = super().create(validated_data)
+        # Hash before saving, so the user is written with a single INSERT.
+        user = User(**validated_data)
         user.set_password(password)
         user.save()
 
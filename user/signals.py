@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from oauth2_provider.models import get_access_token_model
+
+from user.authentication import TokenCache, token_cache
+from user.models import User
+
+AccessToken = get_access_token_model()
+
+
+@receiver(post_save, sender=AccessToken)
+@receiver(post_delete, sender=AccessToken)
+def revoke_cached_token(sender, instance, created=False, **kwargs):
+    """
+    Stop accepting a cached token once it is revoked or changed.
+    """
+    if created:
+        return
+    token_cache.revoke(TokenCache.key(instance.token))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, created=False, update_fields=None,
+                       **kwargs):
+    """
+    Reload a user's cached authentication after the user changes, e.g.
+    is deactivated. New users have nothing cached, and logins, which only
+    update `last_login`, keep it.
+    """
+    if created:
+        return
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    token_cache.forget_user(instance.pk)
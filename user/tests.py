@@ -1,3 +1,256 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from oauth2_provider.models import AccessToken, Application
+from rest_framework.test import APIClient
+
+from .authentication import TokenCache, token_cache
+from .importer import import_users
+from .models import User
+
+
+class SignUpTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def register(self, username="newcomer", email="newcomer@example.com"):
+        return self.client.post(reverse('register'), {
+            'username': username,
+            'email': email,
+            'password': "long-enough-password",
+        }, format='json')
+
+    def test_register_creates_a_user_with_a_hashed_password(self):
+        response = self.register()
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertNotIn('password', response.data)
+        user = User.objects.get(username="newcomer")
+        self.assertTrue(user.check_password("long-enough-password"))
+
+    def test_taken_email_and_username_are_both_reported(self):
+        User.objects.create_user(
+            username="taken", email="first@example.com", password="password")
+        User.objects.create_user(
+            username="other", email="taken@example.com", password="password")
+
+        response = self.register("taken", "taken@example.com")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {'email', 'username'})
+
+        response = self.register("fresh", "first@example.com")
+        self.assertEqual(set(response.data), {'email'})
+
+    def test_register_query_budget_does_not_grow_with_users(self):
+        counts = []
+        for size in (5, 50):
+            User.objects.bulk_create(
+                User(username=f"user{i}", email=f"user{i}@example.com")
+                for i in range(User.objects.count(), size))
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.register(
+                    f"new{size}", f"new{size}@example.com")
+            self.assertEqual(response.status_code, 201, response.data)
+            counts.append(len(ctx.captured_queries))
+
+        # One query checks both unique fields, one inserts the user.
+        self.assertEqual(counts, [2, 2])
+
+
+class TokenCacheTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="password")
+        application = Application.objects.create(
+            user=self.user,
+            client_type=Application.CLIENT_CONFIDENTIAL,
+            authorization_grant_type=Application.GRANT_PASSWORD,
+        )
+        self.token = AccessToken.objects.create(
+            user=self.user, application=application, token="cached-token",
+            expires=timezone.now() + datetime.timedelta(hours=1),
+            scope="read write")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer cached-token")
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+
+    def list_projects(self):
+        return self.client.get(reverse('project-list'))
+
+    def loads_token(self):
+        """
+        Return whether a request reads the token from the database.
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.list_projects().status_code, 200)
+        return any('oauth2_provider_accesstoken' in query['sql']
+                   for query in ctx.captured_queries)
+
+    def test_repeat_requests_run_no_auth_queries(self):
+        with CaptureQueriesContext(connection) as first:
+            self.list_projects()
+        with CaptureQueriesContext(connection) as repeat:
+            self.list_projects()
+
+        # The one query loading the token and its user is skipped, and the
+        # revocation check runs no query of its own.
+        self.assertEqual(
+            len(repeat.captured_queries), len(first.captured_queries) - 1)
+
+    def test_revocations_of_other_processes_are_checked_periodically(self):
+        self.assertTrue(self.loads_token())
+        # Another process revokes the token.
+        cache.set(f'auth-token:token:{TokenCache.key("cached-token")}',
+                  time.time(), 60)
+
+        self.assertFalse(self.loads_token())
+
+        later = time.time() + settings.OAUTH2_TOKEN_REVOCATION_CHECK
+        with mock.patch('user.authentication.time.time',
+                        return_value=later):
+            self.assertTrue(self.loads_token())
+
+    def test_revoked_token_is_rejected_at_once(self):
+        self.assertEqual(self.list_projects().status_code, 200)
+
+        self.token.delete()
+
+        self.assertEqual(self.list_projects().status_code, 401)
+
+    def test_expired_token_is_rejected(self):
+        self.assertTrue(self.loads_token())
+
+        # The entry lasts until the token expires, an hour from now.
+        later = timezone.now() + datetime.timedelta(hours=1)
+        with mock.patch('user.authentication.time.time',
+                        return_value=later.timestamp()), \
+                mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertEqual(self.list_projects().status_code, 401)
+
+    def test_changed_user_is_reloaded(self):
+        self.assertTrue(self.loads_token())
+
+        self.user.first_name = "Renamed"
+        self.user.save()
+
+        self.assertTrue(self.loads_token())
+
+    def test_login_keeps_the_cached_user(self):
+        self.assertTrue(self.loads_token())
+
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+
+        self.assertFalse(self.loads_token())
+
+    def test_each_hit_gets_its_own_user(self):
+        key = TokenCache.key("cached-token")
+        since = timezone.now().timestamp()
+        token_cache.set(key, (self.user, self.token), since)
+
+        first, second = token_cache.get(key), token_cache.get(key)
+        first[0].first_name = "Changed by a request"
+
+        self.assertIsNot(first[0], second[0])
+        self.assertEqual(second[0].first_name, "")
+        self.assertIs(first[1].user, first[0])
+        self.assertEqual(second[0].pk, self.user.pk)
+
+
+class ImportUsersTest(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def import_file(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_users', path, stdout=out, stderr=err,
+                     **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_rows_are_checked_like_sign_up(self):
+        User.objects.create_user(
+            username="taken", email="taken@example.com", password="password")
+        path = self.write('users.csv', "\n".join([
+            "email,username,password",
+            "ann@example.com,ann,long-enough-1",
+            "bob@example.com,bob,short",
+            "taken@example.com,carl,long-enough-3",
+            "ann@example.com,ann2,long-enough-4",
+            "dan@example.com,dan,long-enough-5",
+        ]))
+
+        out, err = self.import_file(path, processes=0)
+
+        self.assertIn("Created 2 user(s), rejected 3 row(s).", out)
+        self.assertIn("Line 3:", err)
+        self.assertIn("Line 4:", err)
+        self.assertIn("Line 5:", err)
+        ann = User.objects.get(username="ann")
+        self.assertTrue(ann.check_password("long-enough-1"))
+        self.assertTrue(User.objects.filter(username="dan").exists())
+
+    def test_ndjson_with_a_process_pool(self):
+        path = self.write('users.ndjson', "\n".join(
+            json.dumps({'email': f"user{i}@example.com",
+                        'username': f"user{i}",
+                        'password': f"password-{i}"})
+            for i in range(4)) + "\nnot json\n")
+
+        out, err = self.import_file(path, processes=2, batch_size=3)
+
+        self.assertIn("Created 4 user(s), rejected 1 row(s).", out)
+        self.assertIn("Line 5:", err)
+        self.assertTrue(
+            User.objects.get(username="user3").check_password("password-3"))
+
+    def test_dry_run_creates_nothing(self):
+        path = self.write('users.csv', "email,username,password\n"
+                                       "ann@example.com,ann,long-enough\n")
+
+        out, _ = self.import_file(path, dry_run=True)
+
+        self.assertIn("Would create 1 user(s)", out)
+        self.assertFalse(User.objects.exists())
+
+    def test_queries_per_batch_do_not_grow_with_rows(self):
+        counts = []
+        for size in (10, 100):
+            rows = [(i, {'email': f"user{size}-{i}@example.com",
+                         'username': f"user{size}-{i}",
+                         'password': "long-enough"})
+                    for i in range(size)]
+            with self.settings(PASSWORD_HASHERS=[
+                    'django.contrib.auth.hashers.MD5PasswordHasher']):
+                with CaptureQueriesContext(connection) as ctx:
+                    created, _ = import_users(rows, batch_size=size)
+            self.assertEqual(created, size)
+            counts.append(len(ctx.captured_queries))
 
-# Create your tests here.
+        # One uniqueness query and one insert per batch.
+        self.assertEqual(counts, [2, 2])